@@ -0,0 +1,318 @@
+"""
+Packed asset bundle.
+
+The images, fonts and sound effects of the game are packed into a single bundle
+file by a build step, so startup doesn't open and decode every file under img/,
+fonts/ and audio/. Images are stored as raw RGBA pixels, both at their full size
+and pre-scaled to every size the character and platforms are drawn at, and sound
+effects are stored as PCM in the format of the mixer. A header index gives the
+position of every asset in the file.
+
+The bundle is memory-mapped when it is opened, and surfaces and sounds are
+created straight from slices of the mapping. It is stored in a directory keyed on
+the resolution, and its index records the modification time and size of every
+source file, so a bundle built for another resolution or from other assets is
+never used without reading the source files when the game starts.
+
+Run `python asset_cache.py` to build the bundle for the configured resolution.
+"""
+
+import io
+import os
+import json
+import mmap
+import struct
+import pygame
+import settings as s
+import scale_objects as so
+from typing import Dict, List, Optional, Tuple
+
+# The bundle file starts with the magic bytes and the length of the index
+BUNDLE_MAGIC: bytes = b"PKASSETS"
+BUNDLE_HEADER = struct.Struct("<8sI")
+
+class AssetBundle:
+    """
+    Class responsible for building and reading the asset bundle of the configured resolution.
+
+    Attributes:
+        root (str): The directory the bundles of every resolution are stored in.
+        sizes (Dict[str, List[Tuple[int, int]]]): The sizes each image is pre-scaled to.
+        index (Dict): The position of every asset in the bundle, once it is opened.
+        buffer (Optional[memoryview]): The memory-mapped bundle, once it is opened.
+        data_start (int): The position in the bundle the assets start at.
+    """
+
+    def __init__(self, root: str = s.ASSET_CACHE_DIR) -> None:
+        """
+        Initializes the AssetBundle class without opening the bundle.
+
+        Args:
+            root (str): The directory the bundles of every resolution are stored in.
+        """
+
+        self.root = root
+        self.sizes: Dict[str, List[Tuple[int, int]]] = self.scaled_sizes()
+        self.index: Dict = {"images": {}, "fonts": {}, "sounds": {}}
+        self.buffer: Optional[memoryview] = None
+        self.data_start: int = 0
+
+    def scaled_sizes(self) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Gets the sizes each image is drawn at in the configured resolution.
+
+        Returns:
+            Dict[str, List[Tuple[int, int]]]: The sizes of each image.
+        """
+
+        platform_height = round(so.PLATFORM_THICKNESS * 2)
+        platform_sizes = [(width, platform_height) for width in so.PLATFORM_WIDTHS]
+        platform_sizes.append((s.WIDTH, platform_height)) # Wide platforms
+
+        character_size = (so.CHARACTER_WIDTH, so.CHARACTER_HEIGHT)
+        sizes = {name: platform_sizes for name in s.ELEMENT_PLATFORMS}
+        sizes["character"] = [character_size]
+        sizes["character_jump"] = [character_size]
+        return sizes
+
+    @staticmethod
+    def scaled_name(name: str, size: Tuple[int, int]) -> str:
+        """
+        Gets the name of a pre-scaled image in the bundle.
+
+        Args:
+            name (str): The name of the image.
+            size (Tuple[int, int]): The width and height of the image.
+
+        Returns:
+            str: The name of the pre-scaled image.
+        """
+
+        return f"{name}@{size[0]}x{size[1]}"
+
+    def source_files(self) -> List[str]:
+        """
+        Gets the files the bundle is built from.
+
+        Returns:
+            List[str]: The paths of the images, fonts and sound effects.
+        """
+
+        files = [os.path.join("img", filename) for filename, _ in s.IMAGES.values()]
+        files.append(s.FONT_PATH)
+        files += [os.path.join("audio", filename) for filename, _ in s.SOUNDS.values()]
+        return files
+
+    def source_stamp(self) -> Dict:
+        """
+        Gets a stamp of the sources that is cheap to check, from the settings the bundle is built
+        with and the modification time and size of the source files.
+
+        Returns:
+            Dict: The stamp of the sources, as it is stored in the index.
+        """
+
+        files = []
+        for path in self.source_files():
+            stat = os.stat(path)
+            files.append([path, stat.st_mtime_ns, stat.st_size])
+        stamp = {"settings": [s.ASSET_CACHE_VERSION, self.sizes, s.MIXER_FORMAT], "files": files}
+        return json.loads(json.dumps(stamp)) # Tuples are stored as lists
+
+    def directory(self) -> str:
+        """
+        Gets the bundle directory of the configured resolution.
+
+        Returns:
+            str: The bundle directory.
+        """
+
+        return os.path.join(self.root, f"v{s.ASSET_CACHE_VERSION}", f"{s.WIDTH}x{s.HEIGHT}")
+
+    def path(self) -> str:
+        """
+        Gets the path of the bundle file of the configured resolution.
+
+        Returns:
+            str: The path of the bundle file.
+        """
+
+        return os.path.join(self.directory(), "assets.bundle")
+
+    def build(self) -> str:
+        """
+        Decodes every asset and packs it into the bundle file.
+
+        The bundle is written to a temporary file that is renamed once it is complete, so a
+        bundle that is being built is never read.
+
+        Returns:
+            str: The path of the bundle file.
+        """
+
+        chunks: List[bytes] = []
+        index: Dict = {"images": {}, "fonts": {}, "sounds": {}}
+        index["stamp"] = self.source_stamp()
+        offset = 0
+
+        def add(section: str, name: str, data: bytes, **info) -> None:
+            nonlocal offset
+            index[section][name] = {"offset": offset, "length": len(data), **info}
+            chunks.append(data)
+            offset += len(data)
+
+        for name, (filename, _) in s.IMAGES.items():
+            img = pygame.image.load(os.path.join("img", filename))
+            add("images", name, pygame.image.tobytes(img, "RGBA"), size=img.get_size())
+            for size in self.sizes.get(name, []):
+                scaled = pygame.transform.scale(img, size)
+                add("images", self.scaled_name(name, size), pygame.image.tobytes(scaled, "RGBA"), size=size)
+
+        with open(s.FONT_PATH, "rb") as f:
+            add("fonts", s.FONT_PATH, f.read())
+
+        s.init_mixer()
+        for name, (filename, _) in s.SOUNDS.items():
+            add("sounds", name, pygame.mixer.Sound(os.path.join("audio", filename)).get_raw())
+        index["mixer"] = list(pygame.mixer.get_init())
+
+        # The offsets in the index start after the header and the index
+        index_data = json.dumps(index).encode()
+        path = self.path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, len(index_data)))
+            f.write(index_data)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(temp_path, path)
+        return path
+
+    def open(self) -> Optional["AssetBundle"]:
+        """
+        Memory-maps the bundle file and reads its index. The bundle is only used if the stamp in
+        its index matches the source files and it was built in the format of the mixer.
+
+        Returns:
+            Optional[AssetBundle]: The opened bundle, or None if the bundle of the configured
+            resolution and source files was not built.
+        """
+
+        path = self.path()
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = BUNDLE_HEADER.unpack_from(mapping)
+        if magic != BUNDLE_MAGIC:
+            mapping.close()
+            return None
+        index = json.loads(bytes(mapping[BUNDLE_HEADER.size:BUNDLE_HEADER.size + index_length]))
+        # The sound effects are stored in the format of the mixer the bundle was built with
+        s.init_mixer()
+        if index.get("stamp") != self.source_stamp() or index.get("mixer") != list(pygame.mixer.get_init()):
+            mapping.close()
+            return None
+        self.index = index
+        self.buffer = memoryview(mapping)
+        self.data_start = BUNDLE_HEADER.size + index_length
+        return self
+
+    def slice(self, section: str, name: str) -> Optional[memoryview]:
+        """
+        Gets the bytes of an asset without copying them.
+
+        Args:
+            section (str): The section of the index the asset is in.
+            name (str): The name of the asset.
+
+        Returns:
+            Optional[memoryview]: The bytes of the asset, or None if it is not in the bundle.
+        """
+
+        entry = self.index[section].get(name)
+        if entry is None or self.buffer is None:
+            return None
+        start = self.data_start + entry["offset"]
+        return self.buffer[start:start + entry["length"]]
+
+    def has_image(self, name: str) -> bool:
+        """
+        Checks if an image is in the bundle.
+
+        Args:
+            name (str): The name of the image.
+
+        Returns:
+            bool: True if the image is in the bundle, False otherwise.
+        """
+
+        return self.buffer is not None and name in self.index["images"]
+
+    def has_sound(self, name: str) -> bool:
+        """
+        Checks if a sound effect is in the bundle, stored in the format of the mixer.
+
+        Args:
+            name (str): The name of the sound effect.
+
+        Returns:
+            bool: True if the sound effect can be read from the bundle, False otherwise.
+        """
+
+        return (self.buffer is not None and name in self.index["sounds"]
+                and list(pygame.mixer.get_init() or []) == self.index.get("mixer"))
+
+    def image(self, name: str) -> Optional[pygame.Surface]:
+        """
+        Creates an image from the bundle. The surface uses the memory-mapped pixels.
+
+        Args:
+            name (str): The name of the image.
+
+        Returns:
+            Optional[pygame.Surface]: The image, or None if it is not in the bundle.
+        """
+
+        pixels = self.slice("images", name)
+        if pixels is None:
+            return None
+        return pygame.image.frombuffer(pixels, tuple(self.index["images"][name]["size"]), "RGBA")
+
+    def font(self, path: str, size: int) -> Optional[pygame.font.Font]:
+        """
+        Creates a font from the bundle.
+
+        Args:
+            path (str): The path of the font file.
+            size (int): The size of the font.
+
+        Returns:
+            Optional[pygame.font.Font]: The font, or None if it is not in the bundle.
+        """
+
+        data = self.slice("fonts", path)
+        if data is None:
+            return None
+        return pygame.font.Font(io.BytesIO(data), size)
+
+    def sound(self, name: str) -> Optional[pygame.mixer.Sound]:
+        """
+        Creates a sound effect from the PCM in the bundle.
+
+        Args:
+            name (str): The name of the sound effect.
+
+        Returns:
+            Optional[pygame.mixer.Sound]: The sound effect, or None if it is not in the bundle or
+            was stored in another mixer format.
+        """
+
+        if not self.has_sound(name):
+            return None
+        return pygame.mixer.Sound(buffer=self.slice("sounds", name))
+
+if __name__ == "__main__":
+    print(f"Built the asset bundle {AssetBundle().build()}")
@@ -0,0 +1,198 @@
+"""
+Audio manager.
+
+Owns the channels of the pygame mixer. Every sound effect plays on its own
+reserved channel, so playing a sound never takes another channel, and a sound
+that is triggered again while it has just started playing is skipped. The long
+elevator track is streamed from its file through pygame.mixer.music instead of
+being decoded into memory. Sound effects are read from the asset bundle, or
+decoded ahead of time on a thread pool if they are not in it.
+"""
+
+import os
+import pygame
+import settings as s
+from concurrent.futures import Executor, Future
+from asset_cache import AssetBundle
+from typing import Dict, Optional, Tuple
+
+class AudioManager:
+    """
+    Class responsible for playing the sound effects and the music of the game.
+
+    Attributes:
+        sounds (Dict[str, Tuple[str, float]]): The file and volume of each sound effect.
+        music (Dict[str, Tuple[str, float]]): The file and volume of each music track.
+        cooldown (int): The time in milliseconds a sound effect is not played again after it starts.
+        loaded (Dict[str, pygame.mixer.Sound]): The sound effects that were loaded.
+        pending (Dict[str, Future]): The sound effects that are being decoded on a thread pool.
+        channels (Dict[str, pygame.mixer.Channel]): The reserved channel of each sound effect.
+        started (Dict[str, int]): The time each sound effect last started playing.
+        music_track (Optional[str]): The music track that is playing.
+        plays (int): The number of sound effects that were played.
+        skipped (int): The number of sound effects that were skipped because they were already playing.
+        music_starts (int): The number of times a music track was started.
+        bundle (Optional[AssetBundle]): The asset bundle the sound effects are read from.
+    """
+
+    def __init__(self, sounds: Dict[str, Tuple[str, float]], music: Dict[str, Tuple[str, float]],
+                 cooldown: int = 500, bundle: Optional[AssetBundle] = None) -> None:
+        """
+        Initializes the AudioManager class. The mixer is initialized the first time a sound is played.
+
+        Args:
+            sounds (Dict[str, Tuple[str, float]]): The file and volume of each sound effect.
+            music (Dict[str, Tuple[str, float]]): The file and volume of each music track.
+            cooldown (int): The time in milliseconds a sound effect is not played again after it starts.
+            bundle (Optional[AssetBundle]): The asset bundle the sound effects are read from.
+        """
+
+        self.sounds = sounds
+        self.music = music
+        self.cooldown = cooldown
+        self.loaded: Dict[str, pygame.mixer.Sound] = {}
+        self.pending: Dict[str, Future] = {}
+        self.channels: Dict[str, pygame.mixer.Channel] = {}
+        self.started: Dict[str, int] = {}
+        self.music_track: Optional[str] = None
+        self.plays: int = 0
+        self.skipped: int = 0
+        self.music_starts: int = 0
+        self.bundle = bundle
+
+    def init_mixer(self) -> None:
+        """Initializes the mixer and reserves a channel for each sound effect."""
+
+        s.init_mixer()
+        if pygame.mixer.get_num_channels() < len(self.sounds):
+            pygame.mixer.set_num_channels(len(self.sounds))
+        pygame.mixer.set_reserved(len(self.sounds))
+        self.channels = {name: pygame.mixer.Channel(i) for i, name in enumerate(self.sounds)}
+
+    def decode(self, name: str) -> pygame.mixer.Sound:
+        """
+        Decode a sound effect from the asset bundle, or from its file if it is not in the bundle.
+
+        Args:
+            name (str): The name of the sound effect.
+
+        Returns:
+            pygame.mixer.Sound: The sound effect.
+        """
+
+        sound = self.bundle.sound(name) if self.bundle is not None else None
+        if sound is None:
+            sound = pygame.mixer.Sound(os.path.join("audio", self.sounds[name][0]))
+        return sound
+
+    def preload(self, executor: Executor) -> None:
+        """
+        Start decoding every sound effect on a thread pool.
+
+        Args:
+            executor (Executor): The thread pool to decode the sound effects on.
+        """
+
+        if not self.channels:
+            self.init_mixer()
+        for name in self.sounds:
+            if self.bundle is not None and self.bundle.has_sound(name):
+                continue # Reading a sound from the bundle doesn't decode it
+            if name not in self.loaded and name not in self.pending:
+                self.pending[name] = executor.submit(self.decode, name)
+
+    def get_sound(self, name: str) -> pygame.mixer.Sound:
+        """
+        Gets a sound effect, loading it the first time it is used, or waiting for it if it is
+        being decoded.
+
+        Args:
+            name (str): The name of the sound effect.
+
+        Returns:
+            pygame.mixer.Sound: The sound effect.
+        """
+
+        sound = self.loaded.get(name)
+        if sound is None:
+            if not self.channels:
+                self.init_mixer()
+            future = self.pending.pop(name, None)
+            sound = self.decode(name) if future is None else future.result()
+            sound.set_volume(self.sounds[name][1])
+            self.loaded[name] = sound
+        return sound
+
+    def play(self, name: str) -> bool:
+        """
+        Plays a sound effect on its channel, unless it started playing less than "cooldown"
+        milliseconds ago.
+
+        Args:
+            name (str): The name of the sound effect.
+
+        Returns:
+            bool: True if the sound effect was played, False if it was skipped.
+        """
+
+        sound = self.get_sound(name)
+        channel = self.channels[name]
+        now = pygame.time.get_ticks()
+        started = self.started.get(name)
+        if started is not None and now - started < self.cooldown and channel.get_busy():
+            self.skipped += 1
+            return False
+
+        channel.play(sound)
+        self.started[name] = now
+        self.plays += 1
+        return True
+
+    def play_music(self, name: str, loops: int = -1) -> None:
+        """
+        Streams a music track, unless it is already playing.
+
+        Args:
+            name (str): The name of the music track.
+            loops (int): The number of times the track is repeated, -1 to repeat it forever.
+        """
+
+        if self.music_track == name:
+            return
+        if not self.channels:
+            self.init_mixer()
+        filename, volume = self.music[name]
+        pygame.mixer.music.load(os.path.join("audio", filename))
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(loops)
+        self.music_track = name
+        self.music_starts += 1
+
+    def fadeout_music(self, time: int) -> None:
+        """
+        Fades out the music track, if one is playing.
+
+        Args:
+            time (int): The time in milliseconds the music fades out over.
+        """
+
+        if self.music_track is not None:
+            pygame.mixer.music.fadeout(time)
+            self.music_track = None
+
+    def channels_busy(self) -> int:
+        """
+        Gets the number of mixer channels that are playing.
+
+        Returns:
+            int: The number of busy channels.
+        """
+
+        if not pygame.mixer.get_init():
+            return 0
+        return sum(pygame.mixer.Channel(i).get_busy() for i in range(pygame.mixer.get_num_channels()))
+
+def load_audio() -> AudioManager:
+    """Create the audio manager of the game."""
+
+    return AudioManager(s.SOUNDS, s.MUSIC, s.SOUND_COOLDOWN, s.bundle)
@@ -0,0 +1,63 @@
+"""
+Dirty region tracking.
+
+Keeps the regions of the screen that changed since the display was last
+updated, so only those regions are sent to the display instead of the whole
+frame.
+"""
+
+import pygame
+from typing import Iterable, List
+
+class DirtyRegion:
+    """
+    Class responsible for tracking the regions of the screen that changed.
+
+    Attributes:
+        rects (List[pygame.Rect]): The regions that changed since the last display update.
+        full (bool): True if the whole screen changed.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the DirtyRegion class with the whole screen marked as changed."""
+
+        self.rects: List[pygame.Rect] = []
+        self.full: bool = True
+
+    def mark(self, rect: pygame.Rect) -> None:
+        """
+        Marks a region of the screen as changed.
+
+        Args:
+            rect (pygame.Rect): The region that changed.
+        """
+
+        if not self.full:
+            self.rects.append(pygame.Rect(rect))
+
+    def mark_all(self, rects: Iterable[pygame.Rect]) -> None:
+        """
+        Marks several regions of the screen as changed.
+
+        Args:
+            rects (Iterable[pygame.Rect]): The regions that changed.
+        """
+
+        for rect in rects:
+            self.mark(rect)
+
+    def mark_full(self) -> None:
+        """Marks the whole screen as changed."""
+
+        self.full = True
+        self.rects = []
+
+    def update_display(self) -> None:
+        """Sends the changed regions to the display and forgets them."""
+
+        if self.full:
+            pygame.display.update()
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.rects = []
+        self.full = False
@@ -7,6 +7,7 @@ Modules:
     character: A module that defines the game character's attributes and behaviors.
 
 Classes:
+    Camera: Defines the view of the game world.
     PlatformManager: Manages the platforms in the game, including their generation and 
     interaction.
     ScrollSystem: Handles the scrolling mechanism of the game.
@@ -0,0 +1,121 @@
+import settings as s
+
+class Camera:
+    """
+    Class responsible for the view of the game world.
+
+    The world uses the same coordinates as the screen when the game starts. As the character climbs,
+    the camera moves up through the world instead of every body in the space being moved down, and
+    the camera position is applied when the game is rendered. The game is rendered between the
+    camera positions of the last two physics steps so drawing stays smooth at any frame rate.
+
+    Attributes:
+        y (float): The world y position of the top of the screen.
+        previous_y (float): The world y position of the top of the screen before the last step.
+        view_y (float): The world y position of the top of the screen used for drawing.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the Camera class at the starting view of the world."""
+
+        self.y: float = 0
+        self.previous_y: float = 0
+        self.view_y: float = 0
+
+    def move(self, scroll_amount: float) -> None:
+        """
+        Moves the camera up.
+
+        Args:
+            scroll_amount (float): The amount to move the camera up by.
+        """
+
+        self.y -= scroll_amount
+
+    def to_screen_y(self, y: float) -> float:
+        """
+        Converts a world y position to a screen y position.
+
+        Args:
+            y (float): The world y position.
+
+        Returns:
+            float: The screen y position.
+        """
+
+        return y - self.y
+
+    def to_view_y(self, y: float) -> float:
+        """
+        Converts a world y position to the screen y position it is drawn at.
+
+        Args:
+            y (float): The world y position.
+
+        Returns:
+            float: The screen y position to draw at.
+        """
+
+        return y - self.view_y
+
+    def to_world_y(self, y: float) -> float:
+        """
+        Converts a screen y position to a world y position.
+
+        Args:
+            y (float): The screen y position.
+
+        Returns:
+            float: The world y position.
+        """
+
+        return y + self.y
+
+    def is_below(self, y: float) -> bool:
+        """
+        Checks if a world y position is below the bottom of the screen.
+
+        Args:
+            y (float): The world y position.
+
+        Returns:
+            bool: True if the position is below the screen, False otherwise.
+        """
+
+        return y - self.y > s.HEIGHT
+
+    def is_visible(self, y: float, half_height: float) -> bool:
+        """
+        Checks if an object centered on a world y position is inside the screen.
+
+        Args:
+            y (float): The world y position of the center of the object.
+            half_height (float): Half of the height of the object.
+
+        Returns:
+            bool: True if any part of the object is on the screen, False otherwise.
+        """
+
+        return -half_height < y - self.view_y < s.HEIGHT + half_height
+
+    def store_previous(self) -> None:
+        """Stores the camera position before a physics step."""
+
+        self.previous_y = self.y
+
+    def interpolate(self, alpha: float) -> None:
+        """
+        Sets the drawing position between the camera positions of the last two physics steps.
+
+        Args:
+            alpha (float): How far the frame is between the last step and the next one, from 0 to 1.
+        """
+
+        self.view_y = self.previous_y + (self.y - self.previous_y) * alpha
+
+    def reset(self) -> None:
+        """Resets the camera to the starting view of the world."""
+
+        self.y = 0
+        self.previous_y = 0
+        self.view_y = 0
@@ -1,15 +1,14 @@
 """ 
 Character module.
 
-This module is responsible for creating the character body, shape, sensor,
+This module is responsible for creating the character body, shape,
 movement and jump. It also assigns key presses for the user to control the
 character.
 """
 
-import settings as s
 import scale_objects as so
 import pymunk, pygame, math
-from typing import Callable, Tuple, List
+from typing import Callable, Optional, Tuple, List
 
 class Character:
     """
@@ -24,7 +23,7 @@ class Character:
         pos_y (float): The y position of the character
         body (pymunk.Body): The body of the character
         shape (pymunk.Shape): The shape of the character
-        sensor_shape (pymunk.Shape): The sensor shape of the character
+        crossing_offset (float): The distance below the character's position at which it crosses platforms
     """
 
     def __init__(self, space: pymunk.Space) -> None:
@@ -36,9 +35,8 @@ class Character:
         self.pos_y: float = so.CHARACTER_POS_Y
         self.body: pymunk.Body = self.character_body()
         self.shape: pymunk.Shape = self.character_shape()
-        self.sensor_shape: pymunk.Shape= self.character_sensor()
+        self.crossing_offset: float = self.height
         self.shape.collision_type = 1
-        self.sensor_shape.collision_type = 3
     
     def character_body(self) -> pymunk.Body:
         """
@@ -82,17 +80,15 @@ class Character:
             scale: float = max_velocity_x / speed
             self.body.velocity = pymunk.Vec2d(velocity.x * scale, velocity.y * scale)
 
-    def character_sensor(self) -> pymunk.Shape:
+    def crossing_y(self) -> float:
         """
-        Create and return a character sensor shape.
-        
+        Get the y position at which the character crosses platforms, below its feet.
+
         Returns:
-            pymunk.Shape: The sensor shape of the character.
+            float: The crossing y position of the character.
         """
 
-        sensor_shape = pymunk.Segment(self.body, (-s.WIDTH, self.height), (s.WIDTH, self.height), 0)
-        sensor_shape.sensor = True
-        return sensor_shape
+        return self.body.position.y + self.crossing_offset
     
     def reset_character(self) -> None:
         """Reset character to starting position and velocity when it's game over."""
@@ -106,13 +102,13 @@ class Movement:
     
     Attributes:
         body (pymunk.Body): The body of the character.
-        character_move (Callable[[], None]): The move function of the character.
+        character_move (Callable[[Optional[List[bool]]], None]): The move function of the character.
     """
 
     def __init__(self, body: pymunk.Body) -> None:
         self.FORCE: int = 2000 
         self.body = body
-        self.character_move: Callable[[], None] = self.move
+        self.character_move: Callable[[Optional[List[bool]]], None] = self.move
 
     def left(self) -> None:
         """Applies force to the right side of the character so it moves to the left."""
@@ -128,10 +124,16 @@ class Movement:
         self.body.apply_impulse_at_local_point((5, 0), (0,0))
         self.body.apply_force_at_local_point((self.FORCE, 0), (0,0))
 
-    def move(self) -> None:
-        """Applies left, right force on key press."""
+    def move(self, key: Optional[List[bool]] = None) -> None:
+        """
+        Applies left, right force on key press.
+
+        Args:
+            key (List[bool]): The pressed keys, read from the keyboard if not given.
+        """
 
-        key: List[bool] = pygame.key.get_pressed()
+        if key is None:
+            key = pygame.key.get_pressed()
 
         if key[pygame.K_LEFT]:
             self.left()
@@ -144,12 +146,12 @@ class Jump:
     
     Attributes:
         body (pymunk.Body): the body of the character.
-        character_jump (Callable[[], None]): The jump function of the character.
+        character_jump (Callable[[Optional[List[bool]]], None]): The jump function of the character.
     """
 
     def __init__(self, body: pymunk.Body) -> None:
         self.body = body
-        self.character_jump: Callable[[], None] = self.jump_key
+        self.character_jump: Callable[[Optional[List[bool]]], None] = self.jump_key
     
     def jump(self) -> None:
         """Applies force to the character from the bottom to jump up."""
@@ -158,10 +160,16 @@ class Jump:
         JUMP_FORCE: float = JUMP_FORCE + abs(self.body.velocity.x) * so.CHARACTER_JUMP_VELOCITY_FACTOR
         self.body.apply_impulse_at_local_point((0, -JUMP_FORCE), (0, 0))
 
-    def jump_key(self) -> None:
-        """Applies jump force on key press."""
+    def jump_key(self, key: Optional[List[bool]] = None) -> None:
+        """
+        Applies jump force on key press.
+
+        Args:
+            key (List[bool]): The pressed keys, read from the keyboard if not given.
+        """
 
-        key: List[bool] = pygame.key.get_pressed()
+        if key is None:
+            key = pygame.key.get_pressed()
 
         if key[pygame.K_SPACE]:
             self.jump()
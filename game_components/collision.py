@@ -2,10 +2,32 @@ import pymunk
 from typing import Tuple, List
 from game_components.character import Character
 
+# The character has its own collision category. Platforms that the character passes through
+# leave it out of their mask, so pymunk skips the pair before any contact is created.
+CHARACTER_CATEGORY: int = 0b1
+CHARACTER_FILTER = pymunk.ShapeFilter(categories=CHARACTER_CATEGORY)
+SOLID_PLATFORM_FILTER = pymunk.ShapeFilter()
+PASS_PLATFORM_FILTER = pymunk.ShapeFilter(mask=pymunk.ShapeFilter.ALL_MASKS() ^ CHARACTER_CATEGORY)
+
 class Collision:
     """
-    Class responsible for assigning the collision types to the shapes and deciding how they 
+    Class responsible for assigning the collision types to the shapes and deciding how they
     should interact inside the space.
+
+    The platforms are one-way. A platform becomes solid once its center is below the character's
+    feet, and only turns pass-through again once the character's head is below its top. The platforms are ordered from the bottom to the
+    top of the world, so the solid platforms are the first "self.solid_end" of them, and only the
+    platforms the character's feet moved past since the last step have their filter changed.
+
+    Attributes:
+        space (pymunk.Space): The space in which the game objects exists.
+        character (Character): The character in the game.
+        platforms (List[Tuple[pymunk.Body, pymunk.Segment]]): The platforms in the game, ordered
+        from the bottom to the top of the world.
+        on_ground (bool): True if the character is standing on a platform.
+        counter (int): The number of platforms that the character crossed.
+        solid_end (int): The number of platforms at the bottom that are solid.
+        filtered_end (int): The number of platforms at the bottom that have a filter assigned.
     """
 
     def __init__(self, space: pymunk.Space, character: Character, platforms: List[Tuple[pymunk.Body, pymunk.Segment]] ) -> None:
@@ -15,84 +37,80 @@ class Collision:
         Args:
             space (pymunk.Space): The space in which the game objects exists.
             character (Character): The character in the game.
-            platforms (List[Tuple[pymunk.Body, pymunk.Segment]]): The platforms in the game. 
+            platforms (List[Tuple[pymunk.Body, pymunk.Segment]]): The platforms in the game.
         """
-        
+
         self.space = space
         self.character = character
         self.platforms = platforms
         self.on_ground: bool = True
         self.counter: int = -1 #This starts at -1 so that the score starts at 0
+        self.solid_end: int = 0
+        self.filtered_end: int = 0
 
-    def collide(self, arbiter, space, data) -> None:
+    def assign_filters(self) -> None:
+        """
+        Assign the collision filters of the character and the platforms.
         """
-        Called when two shapes start touching for the first time.
-        Prevents collision if the character is moving upwards.
 
-        Args:
-            arbiter (Arbiter): The arbiter for the collision.
-            space (Space): The space in which the collision occurred.
-            data (Any): Additional data.
+        self.character.shape.filter = CHARACTER_FILTER
+        self.update_platform_filters()
 
-        Returns:
-            bool: Return True to process the collision normally or False to cause to ignore the 
-            collision entirely.
+    def update_platform_filters(self) -> None:
         """
-        
-        if self.character.body.velocity.y < 0:
-            self.on_ground = False
-            return False
-        elif abs(self.character.body.velocity.y) > 1e-3:
-            self.on_ground = True
-            return True
-        return False
-    
-    def sensor_collide(self, arbiter, space, data) -> None:
-        """
-        Called when the character sensor starts touching a platform for the first time.
-        Increments a counter everytime this happens.
-
-        Args:
-            arbiter (Arbiter): The arbiter for the collision.
-            space (Space): The space in which the collision occurred.
-            data (Any): Additional data.
+        Makes the platforms below the character's feet solid and the rest pass-through.
 
-        Returns:
-            bool: Return True to process the collision normally of False if the body.pass is set
-            to True.
+        New platforms at the top start as pass-through. Then the boundary between the solid and the
+        pass-through platforms is moved up to the character's feet, or down to the character's head,
+        changing the filter of each platform it moves past.
         """
 
-        body = arbiter.shapes[1].body
-        if not body.passed:
-            self.counter += 1
-            body.passed = True
-        return True
+        for _, platform in self.platforms[self.filtered_end:]:
+            platform.filter = PASS_PLATFORM_FILTER
+        self.filtered_end = len(self.platforms)
+
+        feet_y: float = self.character.body.position.y + self.character.height / 2
+        while self.solid_end < len(self.platforms) and self.platforms[self.solid_end][0].position.y >= feet_y:
+            self.platforms[self.solid_end][1].filter = SOLID_PLATFORM_FILTER
+            self.solid_end += 1
+        # A solid platform only turns pass-through once the character's head is below its top. Landing
+        # at full speed can push the feet past the center of the platform before it is pushed back out.
+        head_y: float = self.character.body.position.y - self.character.height / 2
+        while self.solid_end > 0 and self.platforms[self.solid_end - 1][0].position.y - self.platforms[self.solid_end - 1][1].radius < head_y:
+            self.solid_end -= 1
+            self.platforms[self.solid_end][1].filter = PASS_PLATFORM_FILTER
 
-    def add_collision_handlers(self) -> None:
+    def retire_platforms(self, n_platforms: int) -> None:
         """
-        Add collision handler between the character and platform, and the collision handler
-        between the character sensor and the platform.
+        Forgets the platforms that were removed from the bottom of the platforms.
+
+        Args:
+            n_platforms (int): The number of platforms that were removed.
         """
-        
-        self.handler = self.space.add_collision_handler(1, 2)
-        self.handler.begin = self.collide
 
-        self.sensor_handler = self.space.add_collision_handler(3, 2)
-        self.sensor_handler.begin = self.sensor_collide
+        self.solid_end = max(0, self.solid_end - n_platforms)
+        self.filtered_end = max(0, self.filtered_end - n_platforms)
 
     def check_in_air(self) -> bool:
         """
-        Checks if character is in the air.
-        
+        Checks if character is in the air from the contacts of the last physics step. The character
+        is on the ground if a contact pushes it up.
+
         Returns:
             bool: True if character is in the  air, False otherwise.
         """
-        
-        if abs(self.character.body.velocity.y) > 0.01:
-            self.on_ground = False
-        else:
-            self.on_ground = True
+
+        self.on_ground = False
+
+        def check_contact(arbiter: pymunk.Arbiter) -> None:
+            # The character's shape comes first, so the normal points from the character to the
+            # other shape, which is down when the character stands on it
+            if arbiter.normal.y > 0.7:
+                self.on_ground = True
+
+        self.character.body.each_arbiter(check_contact)
+        return not self.on_ground
 
     def reset_counter(self) -> None:
         """Resets the counter."""
-        self.counter = -1
\ No newline at end of file
+        self.counter = -1
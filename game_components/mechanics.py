@@ -1,33 +1,64 @@
 import pygame
 import os
+import atexit
+import logging
+import threading
 import settings as s
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+from game_components.camera import Camera
 from game_components.character import Character
 
+logger = logging.getLogger(__name__)
+
+# A single background thread writes the high score files of every Mechanics instance. It is shut
+# down when the program exits, after the pending writes are done.
+HIGHSCORE_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="highscore")
+atexit.register(HIGHSCORE_WRITER.shutdown)
+
 class Mechanics:
-    """Class responsible for setting the score, checking the game status and restarting the game."""
+    """
+    Class responsible for setting the score, checking the game status and restarting the game.
+
+    The high score is read from its file once and kept in memory. New high scores are written to
+    the file by a background thread, and any pending write is flushed when the game is over and
+    when the program exits.
+    """
     
-    def __init__(self) -> None:
-        """Initializes the Mechanics class."""
+    def __init__(self, high_score_file: str = "highscore.txt") -> None:
+        """
+        Initializes the Mechanics class.
+
+        Args:
+            high_score_file (str): The file the high score is stored in.
+        """
         
         self.score: int = 0
         self.game_over: bool = False
-        self.high_score_file: str = "highscore.txt"
+        self.high_score_file: str = high_score_file
         if not os.path.exists(self.high_score_file):
             with open(self.high_score_file, "w") as f:
                 f.write("0")
+        self.best_score: int = self.get_highscore()
+
+        # Write-behind state for the high score file
+        self.pending_score: Optional[int] = None
+        self.writer: Optional[Future] = None
+        self.writer_lock = threading.Lock()
 
-    def check_game_status(self, character: Character) -> None:
+    def check_game_status(self, character: Character, camera: Camera) -> None:
         """
         Checks if the game is over based on the position of the character.
         
         Args:
             character (Character): The character in the game.
+            camera (Camera): The camera of the game.
         """
         
-        if character.body.position.y > s.HEIGHT:
-            s.PARKOUR_SOUND.play()
+        if camera.is_below(character.body.position.y):
+            s.audio.play("parkour")
             self.game_over = True
+            self.flush_highscore()
     
     def get_score(self, counter: int) -> int:
         """
@@ -55,11 +86,11 @@ class Mechanics:
             int: The high score.
         """
         
-        highscore = self.get_highscore()
-        if self.score > highscore:
-            s.PARKOUR_SOUND.play()
+        if self.score > self.best_score:
+            s.audio.play("parkour")
+            self.best_score = self.score
             self.save_highscore(self.score)
-        return highscore
+        return self.best_score
 
     def get_highscore(self) -> int:
         """ 
@@ -74,19 +105,61 @@ class Mechanics:
 
     def save_highscore(self, score) -> None:
         """
-        Saves the high score to a file.
+        Schedules the high score to be saved to a file by the background writer.
+
+        Scores saved while a write is in progress are merged, only the latest score is written.
 
         Args:
             score (int): The score to save
         """
         
-        with open(self.high_score_file, "w") as f:
-            f.write(str(score))
+        with self.writer_lock:
+            self.pending_score = score
+            if self.writer is None:
+                self.writer = HIGHSCORE_WRITER.submit(self.write_pending_highscore)
+
+    def write_pending_highscore(self) -> None:
+        """
+        Writes the pending high score to a temporary file and renames it over the high score file,
+        so the file always holds a complete score. Runs until no score is pending.
 
-    def restart_key(self) -> None:
-        """Responsible for restarting the game on key press."""
+        A score that can't be written is logged and dropped, the high score is still kept in memory.
+        """
+
+        while True:
+            with self.writer_lock:
+                score = self.pending_score
+                self.pending_score = None
+                if score is None:
+                    self.writer = None
+                    return
+
+            try:
+                temp_file = self.high_score_file + ".tmp"
+                with open(temp_file, "w") as f:
+                    f.write(str(score))
+                os.replace(temp_file, self.high_score_file)
+            except OSError as error:
+                logger.warning("Could not save the high score to %s: %s", self.high_score_file, error)
+
+    def flush_highscore(self) -> None:
+        """Waits for the background writer and writes any high score that is still pending."""
+
+        with self.writer_lock:
+            writer = self.writer
+        if writer is not None:
+            writer.result()
+
+    def restart_key(self, key: Optional[List[bool]] = None) -> None:
+        """
+        Responsible for restarting the game on key press.
+
+        Args:
+            key (List[bool]): The pressed keys, read from the keyboard if not given.
+        """
         
-        key: List[bool] = pygame.key.get_pressed()
+        if key is None:
+            key = pygame.key.get_pressed()
         if key[pygame.K_SPACE]:
             self.game_over = False
             self.score = 0
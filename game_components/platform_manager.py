@@ -1,36 +1,67 @@
 import pymunk
-import random
+import numpy as np
 import settings as s
 import scale_objects as so
-from typing import Tuple, List
+from typing import Callable, Dict, Iterator, Optional, Tuple, List
+from game_components.camera import Camera
 
 class PlatformManager:
     """
-    This class is responsible for creating the platform bodies, shapes and adding them to a list.
-    It also manages the platform positioning in the space so they can be reused.
+    This class is responsible for the platforms of the level, creating the platform bodies, shapes
+    and adding them to a list. It also streams the platforms of the level as the camera climbs.
+
+    The level is generated in chunks of platforms from a seeded random number generator, which draws
+    the positions and sizes of many chunks at once into a random block. The state
+    of the platforms is kept in arrays, one element for each platform ordered from the bottom to the
+    top of the world. Chunks are added to the arrays just ahead of the camera and removed once they
+    fall below the screen, and only the platforms from the bottom of the screen up to
+    "s.SHAPE_DISTANCE" above the character have a body and shape in the space.
 
     Attributes:
         space (pymunk.Space): The space in which the platforms exist.
-        platforms (List): A list of platforms.
-        prev_y (int): The previous y-coordinate of a platform.
+        camera (Camera): The camera of the game.
+        x (np.ndarray): The x-coordinate of each platform.
+        y (np.ndarray): The y-coordinate of each platform.
+        half_width (np.ndarray): Half of the width of each platform.
+        tier (np.ndarray): The element tier of each platform.
+        passed (np.ndarray): True for each platform that the character has crossed.
+        platforms (List): The bodies and shapes of the first "len(platforms)" platforms of the arrays.
+        prev_y (int): The y-coordinate of the next platform that is generated.
         friciton (float): The friction of the platforms.
         min_platform_size (int): The minimum size of a platform.
         max_platform_size (int): The maxamum size of a platform.
         platforms_thickness (int): The thickness of the platforms.
         platform_distance (int): The distance between platforms.
-        n_platforms (int): The number of platforms.
-        passed (bool): A flag indicating whether a platform has been passed.
-        platform_counter (int): A counter for the platforms.
+        chunk_size (int): The number of platforms in a chunk.
+        platform_index (int): The index in the level of the next platform that is generated.
+        platform_counter (int): The number of platforms that fell below the screen.
+        sprites (List): The pre-rendered sprite of each platform, in the same order as the arrays.
+        sprite_factory (Callable[[int, int, int], Surface]): Renders a sprite from an element tier,
+        width and height.
+        sprite_tier (int): The element tier the sprites were rendered with.
+        rng (np.random.Generator): The random number generator of the platform positions and sizes.
+        random_x (np.ndarray): The random block of x-coordinates of the next platforms.
+        random_width (np.ndarray): The random block of widths of the next platforms.
+        random_index (int): The index in the random block of the next platform.
+        stream (Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]): The chunks of the level.
     """
 
-    def __init__(self, space: pymunk.Space) -> None:
+    def __init__(self, space: pymunk.Space, camera: Camera, seed: Optional[int] = None) -> None:
         """
         The constructor for PlatformManager class.
 
         Args:
             space (pymunk.Space): The space in which the platforms exist.
+            camera (Camera): The camera of the game.
+            seed (Optional[int]): The seed of the platform positions and sizes, random if not given.
         """
         self.space = space
+        self.camera = camera
+        self.x: np.ndarray = np.empty(0)
+        self.y: np.ndarray = np.empty(0)
+        self.half_width: np.ndarray = np.empty(0)
+        self.tier: np.ndarray = np.empty(0, dtype=np.int8)
+        self.passed: np.ndarray = np.empty(0, dtype=bool)
         self.platforms: List = []
         self.prev_y: int = so.PREV_Y
         self.friction: float = 1.0
@@ -38,124 +69,305 @@ class PlatformManager:
         self.max_platform_size: int = so.MAX_PLATFORM_SIZE
         self.platforms_thickness: int = so.PLATFORM_THICKNESS
         self.platform_distance: int = so.PLATFORM_DISTANCE
-        self.n_platforms: int = s.NUMBER_OF_PLATFORMS
+        self.chunk_size: int = s.PLATFORMS_PER_CHUNK
+        self.platform_index: int = 0
         self.platform_counter: int = 0
+        self.sprites: List = []
+        self.sprite_factory: Optional[Callable] = None
+        self.sprite_tier: int = 0
+        self.rng = np.random.default_rng(seed)
+        self.random_x: np.ndarray = np.empty(0)
+        self.random_width: np.ndarray = np.empty(0)
+        self.random_index: int = 0
+        self.stream = self.level_stream()
+
+    def __getstate__(self) -> Dict:
+        """
+        Gets the state of the platform manager to pickle. The level stream is not pickled, its
+        state is kept in the attributes of the platform manager.
+
+        Returns:
+            Dict: The attributes of the platform manager without the level stream.
+        """
+
+        state = self.__dict__.copy()
+        del state["stream"]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        """
+        Restores the pickled state of the platform manager and continues the level stream from it.
+
+        Args:
+            state (Dict): The attributes of the platform manager.
+        """
+
+        self.__dict__.update(state)
+        self.stream = self.level_stream()
 
     def create_body(self) -> pymunk.Body:
         """
         Creates and returns a platform body.
-        
+
         Returns:
             pymunk.Body: The created platform body.
         """
 
         body = pymunk.Body(body_type=pymunk.Body.KINEMATIC)
-        body.passed = False
         return body
-    
-    def create_platform(self) -> Tuple[pymunk.Body, pymunk.Segment]:
+
+    def create_platform(self, row: int) -> Tuple[pymunk.Body, pymunk.Segment]:
         """
-        Creates and returns a platform Tuple which includes the body and segment with a 
-        random x size.
-        
+        Creates and returns a platform Tuple which includes the body and segment of a platform
+        in the arrays.
+
+        Args:
+            row (int): The index of the platform in the arrays.
+
         Returns:
             Tuple[pymunk.Body, pymunk.Segment]: The created platform.
         """
 
         body = self.create_body()
+        body.position = (float(self.x[row]), float(self.y[row]))
 
-        platform_size: int = random.randint(so.MIN_PLATFORM_SIZE, so.MAX_PLATFORM_SIZE)
-        half_size: float = platform_size / 2
-
-        x: int =  random.randint(so.PLATFORM_MIN_X, so.PLATFORM_MAX_X)
-        body.position = (x, self.prev_y)
-        platform = pymunk.Segment(body, (-half_size,0), (half_size, 0), self.platforms_thickness)
+        half_size = float(self.half_width[row])
+        platform = pymunk.Segment(body, (-half_size, 0), (half_size, 0), self.platforms_thickness)
         platform.friction = self.friction
         platform.collision_type = 2
-                
+
         return body, platform
-    
-    def create_wide_platform(self) -> Tuple[pymunk.Body, pymunk.Segment]:
+
+    def refill_random_block(self) -> None:
+        """
+        Draws the x positions and widths of the next "s.RANDOM_BLOCK_CHUNKS" chunks of platforms
+        from the random number generator in a single call each.
+        """
+
+        block_size = self.chunk_size * s.RANDOM_BLOCK_CHUNKS
+        self.random_x = self.rng.integers(int(so.PLATFORM_MIN_X), int(so.PLATFORM_MAX_X), block_size, endpoint=True).astype(float)
+        self.random_width = self.rng.choice(np.asarray(so.PLATFORM_WIDTHS, dtype=float), block_size)
+        self.random_index = 0
+
+    def level_stream(self) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
         """
-        Creates and returns a wide platform body and segment.
-        
+        Generates the chunks of platforms of the level from the bottom of the world up.
+
+        Every 50th platform is a wide platform in the center of the screen, and the rest take their
+        x position and size from the random block. The position of the next platform is kept in
+        "self.prev_y", "self.platform_index" and "self.random_index", so the stream continues from
+        them when it is created again.
+
+        Yields:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The x, y and half width of the platforms of
+            the next chunk, from the bottom up.
+        """
+
+        while True:
+            if self.random_index >= len(self.random_x):
+                self.refill_random_block()
+            block = slice(self.random_index, self.random_index + self.chunk_size)
+            x = self.random_x[block].copy()
+            half_width = self.random_width[block] / 2
+            self.random_index += self.chunk_size
+
+            wide = (self.platform_index + np.arange(self.chunk_size)) % 50 == 0
+            x[wide] = s.WIDTH/2
+            half_width[wide] = s.WIDTH/2
+            self.platform_index += self.chunk_size
+
+            y = self.prev_y - self.platform_distance * np.arange(self.chunk_size)
+            self.prev_y -= self.platform_distance * self.chunk_size
+            yield x, y, half_width
+
+    def spawn_chunks(self) -> None:
+        """
+        Adds the next chunks of the level to the arrays until the platforms reach
+        "s.SPAWN_DISTANCE" above the top of the screen.
+        """
+
+        while self.camera.to_screen_y(self.prev_y) > -s.SPAWN_DISTANCE:
+            x, y, half_width = next(self.stream)
+            first = len(self.y)
+            self.x = np.concatenate((self.x, x))
+            self.y = np.concatenate((self.y, y))
+            self.half_width = np.concatenate((self.half_width, half_width))
+            self.tier = np.concatenate((self.tier, np.full(len(y), self.sprite_tier, dtype=np.int8)))
+            self.passed = np.concatenate((self.passed, np.zeros(len(y), dtype=bool)))
+            self.sprites.extend([None] * len(y))
+            for row in range(first, len(self.y)):
+                self.bake_sprite(row)
+
+    def retire_rows(self) -> Tuple[int, int]:
+        """
+        Removes the platforms below the screen from the arrays, and their bodies and shapes from
+        the space.
+
         Returns:
-            Tuple[pymunk.Body, pymunk.Segment]: The created wide platform.
+            Tuple[int, int]: The number of platforms that were removed, and the number of them
+            that had a body and shape in the space.
         """
 
-        body = self.create_body()
-        body.position = (s.WIDTH/2, self.prev_y)
-        platform = pymunk.Segment(body, (-s.WIDTH/2, 0), (s.WIDTH/2, 0), self.platforms_thickness)
-        platform.friction = self.friction
-        platform.collision_type = 2
+        # The platforms are ordered from the bottom up, so the platforms below the screen come first
+        retired = int(np.count_nonzero(self.camera.is_below(self.y)))
+        if retired == 0:
+            return 0, 0
 
-        return body, platform
-    
-    def generate_platform(self) -> List[Tuple[pymunk.Body, pymunk.Segment]]:
+        removed = min(retired, len(self.platforms))
+        for body, platform in self.platforms[:retired]:
+            self.space.remove(body, platform)
+        del self.platforms[:retired]
+        del self.sprites[:retired]
+        self.x = self.x[retired:]
+        self.y = self.y[retired:]
+        self.half_width = self.half_width[retired:]
+        self.tier = self.tier[retired:]
+        self.passed = self.passed[retired:]
+        return retired, removed
+
+    def activate_rows(self, character_y: Optional[float] = None) -> None:
+        """
+        Creates the bodies and shapes of the platforms up to "s.SHAPE_DISTANCE" above the character,
+        or above the center of the screen if the character is not given.
+
+        Args:
+            character_y (Optional[float]): The y position of the character.
+        """
+
+        if character_y is None:
+            character_y = self.camera.to_world_y(s.HEIGHT / 2)
+        active = int(np.count_nonzero(self.y >= character_y - s.SHAPE_DISTANCE))
+        for row in range(len(self.platforms), active):
+            body, platform = self.create_platform(row)
+            self.space.add(body, platform)
+            self.platforms.append((body, platform))
+
+    def count_crossings(self, crossing_y: float) -> int:
         """
-        Generate a list of platforms and bodies.
+        Marks the platforms that the character crossed and counts the new ones.
+
+        A platform is crossed once the crossing height of the character reaches the bottom of the
+        platform. The platforms are ordered from the bottom up, so the crossed platforms are the
+        first ones in the arrays and are found with a binary search on their heights.
 
-        This method generates a list of platforms and bodies based on "self.n_platform".
-        Every 50th platform is a wide platform, and the rest are regular platforms.
+        Args:
+            crossing_y (float): The y position the character crosses platforms at.
+
+        Returns:
+            int: The number of platforms that the character crossed since the last call.
+        """
+
+        # The heights decrease from the bottom up, so they are negated to search them in ascending order
+        crossed = int(np.searchsorted(-self.y, self.platforms_thickness - crossing_y, side="right"))
+        newly_crossed = crossed - int(np.count_nonzero(self.passed[:crossed]))
+        self.passed[:crossed] = True
+        return newly_crossed
+
+    def generate_platform(self, character_y: Optional[float] = None) -> List[Tuple[pymunk.Body, pymunk.Segment]]:
+        """
+        Generate the platforms of the start of the level and add the ones near the character to
+        the space.
+
+        Args:
+            character_y (Optional[float]): The y position of the character.
 
         Returns:
             List[Tuple[pymunk.Body, pymunk.Segment]]: A list of tuples, each containing a "pymunk.Body" and a "pymunk.Segment"
             representing a platform.
         """
 
-        self.platforms = []
-        for i in range(self.n_platforms):
-            if i % 50 == 0:
-                body, platform = self.create_wide_platform()
-            else:
-                body, platform = self.create_platform()
-            self.platforms.append((body, platform))
-            self.prev_y -= self.platform_distance
-        self.platforms = list(self.platforms)
+        self.spawn_chunks()
+        self.activate_rows(character_y)
         return self.platforms
-      
-    def move_platforms(self) -> None:
-        """
-        Moves the platforms back to the top of the list and screen height.
-
-        This method iterates over all platforms in "self.platfoms". If a platform's y position is
-        greater than "s.HEIGHT", it resets the platform's position. Every 50th platform is moved to
-        the center of the screen width, and the rest are moved to a random x position. If a platform's
-        y position is less than 10% of "s.HEIGHT", "self.platform_counter" is incremented.
-        """
-
-        x: int =  random.randint(so.PLATFORM_MIN_X, so.PLATFORM_MAX_X)
-        for i, (body, platform) in enumerate(self.platforms):
-            if body.position.y > s.HEIGHT:
-                body.passed = False
-                if i % 50 == 0:
-                    body.position = pymunk.Vec2d(s.WIDTH/2, self.prev_y)
-                else:
-                    body.position = pymunk.Vec2d(x, self.prev_y)
-                
-                if body.position.y < s.HEIGHT * 0.10:
-                    self.platform_counter += 1
-
-    def reset_platforms(self) -> None:
-        """
-        Reset the platforms to their starting positions when the game resets.
-
-        This method resets the "prev_y" position to "so.PREV_Y" and repositions each platform in
-        "self.platforms". If the platform is every 50th platform, it is moved to the center of the
-        screen width. Otherwise, it is moved to a random x position. The "prev_y" position is then
-        decremented by "self.plastform_distance", and the "passed" attribute of the body is set to
-        False. Finally, "self.platform_counter" is reset to 5.
-        """
-        self.prev_y = so.PREV_Y
-        for i, (body, platform) in enumerate(self.platforms):
-            if i % 50 == 0:
-                body.position = pymunk.Vec2d(s.WIDTH/2, self.prev_y)
-            else:
-                platform_size: int = random.randint(so.MIN_PLATFORM_SIZE, so.MAX_PLATFORM_SIZE)
-                half_size: float = platform_size / 2
-                x: int =  random.randint(so.PLATFORM_MIN_X, so.PLATFORM_MAX_X)
-                body.position = pymunk.Vec2d(x, self.prev_y)
-            self.prev_y -= self.platform_distance
-            body.passed = False
-
-        self.platform_counter = 0
\ No newline at end of file
+
+    def move_platforms(self, character_y: Optional[float] = None) -> int:
+        """
+        Streams the platforms of the level as the camera and the character move.
+
+        The platforms that fell below the screen are removed and counted in
+        "self.platform_counter", new chunks are added above the screen, and the platforms near the
+        character are added to the space. The sprite of every new platform is rendered, and all
+        sprites are rendered again when the element tier changes.
+
+        Args:
+            character_y (Optional[float]): The y position of the character.
+
+        Returns:
+            int: The number of platforms that were removed from the bottom of "self.platforms".
+        """
+
+        retired, removed = self.retire_rows()
+        self.platform_counter += retired
+        self.spawn_chunks()
+        self.activate_rows(character_y)
+
+        if self.element_tier() != self.sprite_tier:
+            self.bake_sprites()
+        return removed
+
+    def visible_rows(self) -> Tuple[int, int]:
+        """
+        Gets the platforms that are inside the drawn view of the camera.
+
+        Returns:
+            Tuple[int, int]: The index of the first visible platform and the index after the last
+            visible platform.
+        """
+
+        view_y = self.y - self.camera.view_y
+        half_height = self.platforms_thickness
+        visible = np.flatnonzero((view_y > -half_height) & (view_y < s.HEIGHT + half_height))
+        if len(visible) == 0:
+            return 0, 0
+        return int(visible[0]), int(visible[-1]) + 1
+
+    def element_tier(self) -> int:
+        """
+        Get the element of the platforms based on "self.platform_counter".
+
+        The element changes every 100 platforms. Once the last element is passed, the counter is reset
+        to its initial value and the elements start over.
+
+        Returns:
+            int: The element tier, from 0 to 3.
+        """
+
+        if self.platform_counter >= 400:
+            self.platform_counter = 5 # Resets the counter to its initial value
+        return self.platform_counter // 100
+
+    def load_sprites(self, sprite_factory: Callable) -> None:
+        """
+        Set the function used to render the platform sprites and render a sprite for every platform.
+
+        Args:
+            sprite_factory (Callable[[int, int, int], Surface]): Renders a sprite from an element tier,
+            width and height.
+        """
+
+        self.sprite_factory = sprite_factory
+        self.bake_sprites()
+
+    def bake_sprite(self, index: int) -> None:
+        """
+        Render the sprite of a single platform from its width and element tier.
+
+        Args:
+            index (int): The index of the platform in the arrays.
+        """
+
+        if self.sprite_factory is None:
+            return
+        platform_width = float(self.half_width[index]) * 2
+        self.sprites[index] = self.sprite_factory(int(self.tier[index]), platform_width, self.platforms_thickness * 2)
+
+    def bake_sprites(self) -> None:
+        """Render the sprites of all the platforms with the current element tier."""
+
+        self.sprite_tier = self.element_tier()
+        self.tier[:] = self.sprite_tier
+        if self.sprite_factory is None:
+            return
+        self.sprites[:] = [None] * len(self.y)
+        for i in range(len(self.y)):
+            self.bake_sprite(i)
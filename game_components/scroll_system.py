@@ -1,52 +1,59 @@
 import pymunk
 import settings as s
 from typing import Tuple, List
+from game_components.camera import Camera
 from game_components.character import Character
 
 class Scroll:
     """
     Class responsible for creating the infinite scroll effect in the game.
 
-    This class handles the scrolling of the game world, including the movement of the camera and
-    the platforms. It also keeps track of the platforms that the character has passed.
+    This class handles the scrolling of the game world by moving the camera. The bodies in the
+    space are not moved, the camera position is applied when the game is rendered. The platforms
+    that the character has passed are kept by the platform manager.
 
     Attributes:
         space (pymunk.Space): The space in which the game objects exist.
+        camera (Camera): The camera of the game.
         character_body (pymunk.Body): The body of the character.
-        platforms (list[Tuple[pymunk.Body, pymunk.Segment]]): The platforms in the game.
-        platforms_passed (int): The number of platforms that the character has passed.
+        platforms (list[Tuple[pymunk.Body, pymunk.Segment]]): The platforms in the game, ordered
+        from the bottom to the top of the world.
         speed (float): The current speed of the scrolling.
         max_speed (float): The maximim speed of the scrolling.
-        passed_platforms (dict): A dictionary to keep track of the platforms that have been passed.
     """
 
-    def __init__(self, space: pymunk.Space, character: Character, platforms: List[Tuple[pymunk.Body, pymunk.Segment]]) -> None:
+    def __init__(self, space: pymunk.Space, character: Character, platforms: List[Tuple[pymunk.Body, pymunk.Segment]], camera: Camera) -> None:
         """
-        Initializes the Scroll class with the given space, character, and platforms.
+        Initializes the Scroll class with the given space, character, platforms and camera.
 
         Args:
             space (pymunk.Space): The space in which the game objects exists.
             character (Character): The character in the game.
-            platforms (list[Tuple[pymunk.Body, pymunk.Segment]]): The platforms in the game.
+            platforms (list[Tuple[pymunk.Body, pymunk.Segment]]): The platforms in the game, ordered
+            from the bottom to the top of the world.
+            camera (Camera): The camera of the game.
         """
 
         self.space = space
+        self.camera = camera
         self.character_body = character.body
         self.platforms = platforms
-        self.platforms_passed: int = 0
         self.speed: float = 0
-        self.max_speed: float = 3.0
-        self.passed_platforms: dict = {}
+        self.max_speed: float = 6.0
+
+    def reset(self) -> None:
+        """Resets the scroll speed when the game resets."""
+
+        self.speed = 0
 
     def move_camera(self) -> float:
         """
         Move camera based on character's y position.
         
-        If the character's y position is less than half of the screen height, the scroll amount 
-        is calculated as the difference between half of the screen height and the character's y
-        position.
-        Then, the y position of all bodies in the space is increased by the scroll amount. Finally,
-        the platform counter is updated.
+        If the character's screen y position is less than half of the screen height, the scroll
+        amount is calculated as the difference between half of the screen height and the character's
+        screen y position.
+        Then, the camera is moved up by the scroll amount.
 
         Returns:
             float: The amount of scrolling.
@@ -55,62 +62,30 @@ class Scroll:
         follow_height: float = s.HEIGHT / 2
         scroll_amount: int = 0 # Initialize scroll_amount
 
-        if self.character_body.position.y < follow_height:
-            scroll_amount: float = follow_height - self.character_body.position.y
+        character_y: float = self.camera.to_screen_y(self.character_body.position.y)
+        if character_y < follow_height:
+            scroll_amount: float = follow_height - character_y
 
-        for body in self.space.bodies:
-            body.position = pymunk.Vec2d(body.position.x, body.position.y + scroll_amount)        
-    
-        self.platform_counter()
+        self.camera.move(scroll_amount)
         return scroll_amount
 
-    def platform_counter(self) -> int:
-        """
-        Counts the number of platforms that the character has passed.
-
-        This method iterates over all paltforms. If the character's y position is less than the
-        platform's y position and the platform have not been passed before, it increments the
-        counter and marks the platform as passed.
-
-        If all platforms have been passed, it resets the counter and the passed status of all 
-        platforms.
-
-        Returns:
-            int: The number of platforms that the character has passed since the last reset.
-        """
-        
-        counter: int = 0
-        for body, platform in self.platforms:
-            if self.character_body.position.y < body.position.y:
-                if body not in self.passed_platforms:
-                    self.passed_platforms[platform] = 1
-                    counter += 1
-
-        if sum(self.passed_platforms.values()) == len(self.platforms):
-            counter: int = 0
-            for platform in self.passed_platforms:
-                self.passed_platforms[platform] = 0
-        return counter
-
     def auto_scroll(self, elapsed_time) -> float:
         """
-        Adjusts the speed of the scrolling based on the elapsed time and moves all bodies in the
-        space accordingly.
+        Adjusts the speed of the scrolling based on the elapsed time and moves the camera
+        accordingly.
 
-        This method first calculates the speed by adding 0.5 to the ration of the elaptsed time to 60.
+        This method first calculates the speed by adding 1 to the ratio of the elapsed time to 30.
         If the calculated speed exceeds the maxium speed, it is set to the maximum speed.
 
-        Then, it iterates over all bodies in the space and adjusts their y position by adding the
-        calculated speed. This creates the effect of scrolling.
+        Then, it moves the camera up by the calculated speed. This creates the effect of scrolling.
 
         Returns:
             float: The calculated speed of the scrolling.
         """
         
-        self.speed: float = 0.5 + elapsed_time / 60
+        self.speed: float = 1 + elapsed_time / 30
         if self.speed > self.max_speed:
             self.speed = self.max_speed
-        for body in self.space.bodies:
-            body.position = pymunk.Vec2d(body.position.x, body.position.y + self.speed)
+        self.camera.move(self.speed)
         return self.speed
     
\ No newline at end of file
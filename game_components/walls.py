@@ -1,12 +1,13 @@
 import scale_objects as so
 from typing import Tuple
 import pymunk
+from game_components.camera import Camera
 
 class Walls:
     """
     Class responsible for creating the walls of the game to prevent the character from going 
     out of bounds from the sides and creates a bounce effect when colliding with the character
-    to boost velocity.
+    to boost velocity. The walls are attached to a kinematic body that follows the camera.
     """
 
     def __init__(self, space: pymunk.Space) -> None:
@@ -18,18 +19,30 @@ class Walls:
         """
         
         self.space = space
+        self.body = pymunk.Body(body_type=pymunk.Body.KINEMATIC)
 
     def create_walls(self) -> Tuple[pymunk.Segment, pymunk.Segment]:
         """
-        Creates and returns static body segments as the wall.
+        Creates and returns the wall segments attached to the wall body.
 
         Returns:
             Tuple[Pymunk.Segment, pymunk.Segment]: A tuple of two pymunk.Segment objects representing the left and right walls of 
             the game.
         """
 
-        LEFT_WALL = pymunk.Segment(self.space.static_body, (0, 0), (0, so.WALL_HEIGHT), so.WALL_THICKNESS)
+        LEFT_WALL = pymunk.Segment(self.body, (0, 0), (0, so.WALL_HEIGHT), so.WALL_THICKNESS)
         LEFT_WALL.elasticity: float = 1
-        RIGHT_WALL = pymunk.Segment(self.space.static_body, (so.RIGHT_WALL_WIDTH, so.WALL_HEIGHT), (so.RIGHT_WALL_WIDTH, 0), so.WALL_THICKNESS)
+        RIGHT_WALL = pymunk.Segment(self.body, (so.RIGHT_WALL_WIDTH, so.WALL_HEIGHT), (so.RIGHT_WALL_WIDTH, 0), so.WALL_THICKNESS)
         RIGHT_WALL.elasticity: float = 1
         return LEFT_WALL, RIGHT_WALL
+
+
+    def follow(self, camera: Camera) -> None:
+        """
+        Moves the walls with the camera so they always cover the height of the screen.
+
+        Args:
+            camera (Camera): The camera of the game.
+        """
+
+        self.body.position = pymunk.Vec2d(0, camera.y)
@@ -2,7 +2,13 @@ import sys
 import pygame
 import settings as s
 import scale_objects as so
+from collections import defaultdict
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
 from images import Images
+from dirty_region import DirtyRegion
+from profiler import FrameProfiler
+from text_cache import HudText, text_cache
 from game_setup import GameSetup
 from game_components.character import Jump
 from game_components.character import Movement
@@ -10,6 +16,19 @@ from game_components.collision import Collision
 from game_components.mechanics import Mechanics 
 from game_components.scroll_system import Scroll
 
+class GameState(Enum):
+    """
+    The states of the game.
+
+    PLAYING: The game is running.
+    GAME_OVER: The game over screen is displayed until the game is restarted.
+    RESTARTING: The world is reset before the game runs again.
+    """
+
+    PLAYING = "playing"
+    GAME_OVER = "game_over"
+    RESTARTING = "restarting"
+
 class GameManager:
     """
     Class is responsible for managing the game state, including the character, platforms,
@@ -26,25 +45,75 @@ class GameManager:
             game_setup (GameSetup): The game setup to initialize the GameManager with.
         """
 
-        # Initialize game setup and related attributes   
+        # Initialize game setup and the objects of the world
         self.game_setup = game_setup
-        self.space = game_setup.get_space()        
-        self.character = game_setup.get_character()
-        self.platform_manager = game_setup.get_platform_manager()
-        self.platforms = self.game_setup.get_platform_manager().platforms
-        
-        # Initialize character movement, jump and collision
-        self.character_movement = Movement(self.character.body)
-        self.character_jump = Jump(self.character.body)
-        self.collision = Collision(self.space,self.character, self.platforms)
+        self.bind_world()
         
-        # Initialize scroll, mechanics, and images
-        self.scroll = Scroll(self.space, self.character, self.platforms)
+        # Initialize mechanics and images
         self.mechanic = Mechanics()
         self.images = Images()
+        self.platform_manager.load_sprites(self.images.platform_sprite)
 
-        # Initialize scroll timer
+        # Initialize scroll timer, measured in simulated milliseconds
+        self.simulation_ticks: float = 0.0
         self.auto_scroll_start_ticks = s.START_TICKS
+        self.auto_scroll_seconds: float = 0.0
+
+        # Initialize the HUD fields, which are only rendered again when their value changes
+        self.highscore_text = HudText(s.general_font, s.WHITE)
+        self.time_text = HudText(s.general_font, s.WHITE)
+        self.score_text = HudText(s.general_font, s.WHITE)
+
+        # Initialize the regions of the screen that changed since the display was last updated, and
+        # what the last frame was drawn with
+        self.dirty = DirtyRegion()
+        self.drawn_view: Tuple[float, int] = None
+        self.drawn_state: GameState = None
+        self.character_rect: pygame.Rect = None
+        self.character_img: pygame.Surface = None
+        self.overlay_drawn: bool = False
+
+        # Initialize the keys pressed during the current simulation step, and how far the current
+        # frame is between the last simulation step and the next one
+        self.key: Optional[List[bool]] = None
+        self.alpha: float = 1.0
+
+        # Initialize the state of the game and the game over screen, which is drawn once when the
+        # game ends
+        self.state: GameState = GameState.PLAYING
+        self.game_over_frame: pygame.Surface = None
+
+        # Initialize the stages of a simulation step and of a frame, measured by the profiler
+        self.profiler = FrameProfiler(enabled=s.PROFILE)
+        self.update_stages = [
+            ("store_previous_state", self.store_previous_state),
+            ("update_character_movements", self.update_character_movements),
+            ("update_character_jump", self.update_character_jump),
+            ("update_max_velocity_and_angle", self.update_max_velocity_and_angle),
+            ("update_platforms", self.update_platforms),
+            ("update_scroll", self.update_scroll),
+            ("update_auto_scroll", self.update_auto_scroll),
+            ("update_score", self.update_score),
+            ("update_game_status", self.update_game_status),
+            ("update_highscore", self.update_highscore),
+            ("update_walls", self.update_walls),
+            ("update_music", self.update_music),
+            ("step_physics", self.step_physics),
+            ("update_crossings", self.update_crossings),
+        ]
+        self.render_stages = [
+            ("interpolate_camera", self.interpolate_camera),
+            ("update_dirty_region", self.update_dirty_region),
+            ("move_background", self.move_background),
+            ("draw_background", self.draw_background),
+            ("draw_platform", self.draw_platform),
+            ("draw_character", self.draw_character),
+            ("draw_wall", self.draw_wall),
+            ("display_score_time", self.display_score_time),
+        ]
+
+        # Initialize the character position before the last physics step for interpolation
+        self.previous_character_position = self.character.body.position
 
         # Initialize background image setup for scrolling
         self.background1 = self.images.bg
@@ -54,19 +123,40 @@ class GameManager:
         self.background2_y = 0
         self.background_scroll = 0
     
+    def bind_world(self) -> None:
+        """
+        Gets the objects of the world from the game setup and creates the character movement,
+        jump, collision and scroll of the world.
+        """
+
+        self.space = self.game_setup.get_space()
+        self.camera = self.game_setup.get_camera()
+        self.walls = self.game_setup.get_walls()
+        self.character = self.game_setup.get_character()
+        self.platform_manager = self.game_setup.get_platform_manager()
+        self.platforms = self.platform_manager.platforms
+
+        # Initialize character movement, jump and collision
+        self.character_movement = Movement(self.character.body)
+        self.character_jump = Jump(self.character.body)
+        self.collision = Collision(self.space, self.character, self.platforms)
+
+        # Initialize scroll
+        self.scroll = Scroll(self.space, self.character, self.platforms, self.camera)
+
     def update_collision(self) -> None:
         """
-        Updates the collision handlers for the character and platforms.
+        Assigns the collision filters of the character and platforms.
         """
 
-        self.collision.add_collision_handlers()
+        self.collision.assign_filters()
     
     def update_character_movements(self) -> None:
         """
         Updates the character's movement based on the current game state.
         """
 
-        self.character_movement.character_move()
+        self.character_movement.character_move(self.key)
 
     def update_character_jump(self) -> None:
         """
@@ -74,7 +164,7 @@ class GameManager:
         """
         self.collision.check_in_air()
         if self.collision.on_ground:
-            self.character_jump.character_jump()
+            self.character_jump.character_jump(self.key)
 
     def update_max_velocity_and_angle(self) -> None:
         """
@@ -87,10 +177,13 @@ class GameManager:
         
     def update_platforms(self) -> None:
         """
-        Updates the platforms' positions based on the current game state.
+        Streams the platforms of the level based on the current game state, and makes the platforms
+        below the character solid.
         """
 
-        self.platform_manager.move_platforms()
+        retired = self.platform_manager.move_platforms(self.character.body.position.y)
+        self.collision.retire_platforms(retired)
+        self.collision.update_platform_filters()
 
     def update_scroll(self) -> None:
         """
@@ -102,7 +195,7 @@ class GameManager:
 
     def update_auto_scroll(self) -> float:
         """
-        Updates the game's auto-scrolling based on the elapsed time.
+        Updates the game's auto-scrolling based on the elapsed simulation time.
 
         Returns:
             float: The elapsed time since auto-scrolling started.
@@ -110,13 +203,22 @@ class GameManager:
         
         if self.collision.counter >= 10:
             if self.auto_scroll_start_ticks == 0:
-                self.auto_scroll_start_ticks = pygame.time.get_ticks()
-            seconds = (pygame.time.get_ticks() - self.auto_scroll_start_ticks) / 1000
+                self.auto_scroll_start_ticks = self.simulation_ticks
+            seconds = (self.simulation_ticks - self.auto_scroll_start_ticks) / 1000
             scroll_speed = self.scroll.auto_scroll(seconds)
             self.background_scroll += scroll_speed
+            self.auto_scroll_seconds = seconds
             return seconds
         else: 
+            self.auto_scroll_seconds = 0.0
             return 0.0
+
+    def update_walls(self) -> None:
+        """
+        Moves the walls with the camera.
+        """
+
+        self.walls.follow(self.camera)
     
     def scroll_background(self) -> None:
         """
@@ -155,39 +257,74 @@ class GameManager:
         Updates the game status based on the current game state.
         """
         
-        self.mechanic.check_game_status(self.character)
+        self.mechanic.check_game_status(self.character, self.camera)
     
-    def game_over_display(self) -> None:
+    def compose_game_over_frame(self) -> pygame.Surface:
         """
-        Displays the game over screen when the game ends.
+        Draws the game over screen with the final score and the high score.
+
+        Returns:
+            pygame.Surface: The game over screen.
         """
-        s.screen.fill(s.BURGANDY)
+        frame = pygame.Surface(s.screen.get_size()).convert(s.screen)
+        frame.fill(s.BURGANDY)
         highscore = s.general_font.render(f"Highscore: {self.update_highscore()}", True, s.WHITE)
-        s.screen.blit(highscore, (s.WIDTH*0.79, s.HEIGHT*0.02))
+        frame.blit(highscore, (s.WIDTH*0.79, s.HEIGHT*0.02))
         score = s.general_font.render(f"Score: {self.update_score()}", True, s.WHITE)
-        s.screen.blit(score, (s.WIDTH*0.40, s.HEIGHT*0.60))
-        restart = s.general_font.render("Game Over - Press Space to Restart", True, s.WHITE)
-        s.screen.blit(restart, (s.WIDTH*0.25,s.HEIGHT/2))
-        main_menu = s.general_font.render("Press ESC to Exit", True, s.WHITE)
-        s.screen.blit(main_menu, (s.WIDTH*0.37,s.HEIGHT*0.55))
-        self.draw_character_game_over()
-        self.bg_y = 0
+        frame.blit(score, (s.WIDTH*0.40, s.HEIGHT*0.60))
+        restart = text_cache.render(s.general_font, "Game Over - Press Space to Restart", s.WHITE)
+        frame.blit(restart, (s.WIDTH*0.25,s.HEIGHT/2))
+        main_menu = text_cache.render(s.general_font, "Press ESC to Exit", s.WHITE)
+        frame.blit(main_menu, (s.WIDTH*0.37,s.HEIGHT*0.55))
+        self.draw_character_game_over(frame)
+        return frame
+
+    def game_over_display(self) -> None:
+        """
+        Displays the game over screen when the game ends.
+        """
+        s.screen.blit(self.game_over_frame, (0, 0))
+
+    def end_game(self) -> None:
+        """
+        Enters the game over state. The game over screen is composed and the game over music is
+        started when the game over screen is first rendered, so simulation steps don't draw anything.
+        """
+        self.state = GameState.GAME_OVER
+
+    def update_game_over(self) -> None:
+        """
+        Waits for the restart key while the game over screen is displayed.
+        """
+        self.mechanic.restart_key(self.key)
+        if self.mechanic.game_over is False:
+            self.state = GameState.RESTARTING
+
+    def restart_game(self) -> None:
+        """
+        Restores the world from the snapshot taken when it was set up and runs the game again.
+        """
+        self.game_setup.restore_snapshot()
+        self.bind_world()
+        self.update_collision()
+        self.platform_manager.load_sprites(self.images.platform_sprite)
         self.background_scroll = 0
-        self.scroll.speed = 0
         self.auto_scroll_start_ticks = s.START_TICKS
-        self.character.reset_character()
-        self.platform_manager.reset_platforms()
-        self.collision.reset_counter()
-        self.mechanic.restart_key()
+        self.auto_scroll_seconds = 0.0
+        self.store_previous_state()
+        self.game_over_frame = None
+        self.state = GameState.PLAYING
 
-        self.quit_game()
-
-    def quit_game(self) -> None:
+    def quit_game(self, key: Optional[List[bool]] = None) -> None:
         """
         Quits the game and exits the program when the user presses the ESC key.
+
+        Args:
+            key (List[bool]): The pressed keys, read from the keyboard if not given.
         """
         
-        key = pygame.key.get_pressed()
+        if key is None:
+            key = pygame.key.get_pressed()
         if key[pygame.K_ESCAPE]:
             pygame.quit()
             sys.exit()
@@ -200,14 +337,12 @@ class GameManager:
 
     def display_score_time(self) -> None:
         """
-        Displays the current score and elapsed time on the game screen.
+        Displays the current score and elapsed time on the game screen. Each field is only rendered
+        again when its value changes.
         """
-        highscore = s.general_font.render(f"{self.update_highscore()}", True, s.WHITE)
-        s.screen.blit(highscore, (s.WIDTH*0.92, s.HEIGHT*0.02))
-        time = s.general_font.render(f"Time: {self.update_auto_scroll():.2f}s", True, s.WHITE)
-        s.screen.blit(time, (s.WIDTH*0.01,s.HEIGHT*0.02))
-        score = s.general_font.render(f"Score: {self.update_score()}", True, s.WHITE)
-        s.screen.blit(score, (s.WIDTH*0.01,s.HEIGHT*0.07))
+        self.dirty.mark_all(self.highscore_text.draw(s.screen, f"{self.update_highscore()}", (s.WIDTH*0.92, s.HEIGHT*0.02)))
+        self.dirty.mark_all(self.time_text.draw(s.screen, f"Time: {self.auto_scroll_seconds:.2f}s", (s.WIDTH*0.01,s.HEIGHT*0.02)))
+        self.dirty.mark_all(self.score_text.draw(s.screen, f"Score: {self.update_score()}", (s.WIDTH*0.01,s.HEIGHT*0.07)))
 
     def draw_wall(self) -> None:
         """
@@ -221,85 +356,200 @@ class GameManager:
 
     def draw_character(self) -> None:
         """
-        Draws the character sprite on the game screen.
+        Draws the character sprite on the game screen between its positions before and after the
+        last physics step.
         """
         
         if not self.collision.on_ground:
-            character_img = self.images.character_jumpimg
+            character_img = self.images.sprite("character_jump", self.character.width, self.character.height)
         else:
-            character_img = self.images.character_img
-            
-        character_img = self.images.scale_images(character_img, self.character.width, self.character.height)
-        pos_x = self.character.body.position.x - character_img.get_width() / 2
-        pos_y = self.character.body.position.y - character_img.get_height() / 2
-        s.screen.blit(character_img, (pos_x, pos_y))
+            character_img = self.images.sprite("character", self.character.width, self.character.height)
+
+        position = self.previous_character_position.interpolate_to(self.character.body.position, self.alpha)
+        pos_x = position.x - character_img.get_width() / 2
+        pos_y = self.camera.to_view_y(position.y) - character_img.get_height() / 2
+        character_rect = s.screen.blit(character_img, (pos_x, pos_y))
+
+        # The character is drawn over the region it was drawn in before, and the region is also
+        # sent again when the sprite changes in place
+        if character_rect != self.character_rect or character_img is not self.character_img:
+            if self.character_rect is not None:
+                self.dirty.mark(self.character_rect)
+            self.dirty.mark(character_rect)
+            self.character_rect = character_rect
+            self.character_img = character_img
 
-    def draw_character_game_over(self) -> None:
+    def draw_character_game_over(self, frame: pygame.Surface) -> None:
         """
-        Draws the game over character sprite on the game screen.
+        Draws the game over character sprite on the game over screen.
+
+        Args:
+            frame (pygame.Surface): The game over screen.
         """
         character_img = self.images.character_gg
-        s.screen.blit(character_img, (s.WIDTH*0.36, s.HEIGHT*0.20))
+        frame.blit(character_img, (s.WIDTH*0.36, s.HEIGHT*0.20))
+
+    def visible_platforms(self) -> List[Tuple[pygame.Surface, Tuple[float, float]]]:
+        """
+        Gets the platform sprites that are inside the screen and their screen positions.
+
+        Returns:
+            List[Tuple[pygame.Surface, Tuple[float, float]]]: The sprites and positions to draw.
+        """
+
+        pm = self.platform_manager
+        first, last = pm.visible_rows()
+        pos_x = pm.x[first:last] - pm.half_width[first:last]
+        pos_y = self.camera.to_view_y(pm.y[first:last]) - pm.platforms_thickness
+        return list(zip(pm.sprites[first:last], zip(pos_x.tolist(), pos_y.tolist())))
 
     def draw_platform(self) -> None:
         """
-        Draws the platform sprites on the game screen and updates the sprite based on the platform counter.
+        Draws the pre-rendered sprites of the platforms inside the screen in a single batch.
         """
         
-        for i, (body, platform) in enumerate(self.platforms):
-            platform_img = None
-
-            if self.platform_manager.platform_counter < 100:
-                platform_img = self.images.earth_platform
-            elif self.platform_manager.platform_counter < 200:
-                platform_img = self.images.water_platform
-            elif self.platform_manager.platform_counter < 300:
-                platform_img = self.images.lava_platform
-            elif self.platform_manager.platform_counter < 400:
-                platform_img = self.images.air_platform
-            else:
-                platform_img = self.images.earth_platform
-                self.platform_manager.platform_counter = 5 #Resets the counter to its initial value
-
-            platform_width = abs(platform.a.x - platform.b.x)
-            platform_img = self.images.scale_images(platform_img, platform_width, (so.PLATFORM_THICKNESS*2))
-
-            pos_x = body.position.x - platform_img.get_width() / 2
-            pos_y = body.position.y - platform_img.get_height() / 2
-            s.screen.blit(platform_img, (pos_x, pos_y))
+        s.screen.blits(self.visible_platforms(), doreturn=False)
             
     def draw_background(self) -> None:
         """
         Draws the background sprites on the game screen.
         """
 
-        s.screen.blit(self.background1, (0, self.background1_y))
-        s.screen.blit(self.background2, (0, self.background2_y))
+        # The background scroll is counted per physics step, so it is moved back to the drawn camera position
+        offset = self.camera.y - self.camera.view_y
+        s.screen.blit(self.background1, (0, self.background1_y + offset))
+        s.screen.blit(self.background2, (0, self.background2_y + offset))
 
-    def run_game(self) -> None:
+    def interpolate_camera(self) -> None:
         """
-        Runs the game loop, updating the game state and rendering game elements on the screen.
+        Moves the drawn camera position between the last two physics steps.
         """
-        
-        if self.mechanic.game_over is False:  
-            self.move_background()
-            self.draw_background()
-            self.draw_platform()
-            self.draw_character()
-            self.draw_wall()
-            self.update_character_movements() 
-            self.update_character_jump()
-            self.update_max_velocity_and_angle()
-            self.update_platforms()
-            self.update_scroll()
-            self.update_auto_scroll()
-            self.update_score()
-            self.display_score_time()
-            self.update_game_status()
-            self.update_highscore()
-            self.quit_game()
-            s.ELEVATOR.fadeout(1)
+
+        self.camera.interpolate(self.alpha)
+
+    def update_dirty_region(self) -> None:
+        """
+        Marks the whole screen as changed when the background scrolls or the platform sprites change.
+        Otherwise only the regions of the elements that moved or changed are updated.
+        """
+
+        view = (self.camera.view_y, self.platform_manager.sprite_tier)
+        if view != self.drawn_view:
+            self.dirty.mark_full()
+            self.drawn_view = view
+
+    def update_display(self) -> None:
+        """
+        Updates the regions of the display that changed since the last update.
+        """
+
+        self.dirty.update_display()
+
+    def store_previous_state(self) -> None:
+        """
+        Stores the character and camera positions before a physics step, so the drawing positions
+        can be interpolated between the last two steps.
+        """
+
+        self.previous_character_position = self.character.body.position
+        self.camera.store_previous()
+
+    def step_physics(self) -> None:
+        """
+        Advances the physics by one simulation step, split into "s.PHYSICS_SUBSTEPS" steps.
+        """
+
+        substep_dt = s.dt / s.PHYSICS_SUBSTEPS
+        for _ in range(s.PHYSICS_SUBSTEPS):
+            self.space.step(substep_dt)
+
+    def update_crossings(self) -> None:
+        """
+        Counts the platforms that the character crossed in the last physics step.
+        """
+
+        self.collision.counter += self.platform_manager.count_crossings(self.character.crossing_y())
+
+    def update_music(self) -> None:
+        """
+        Fades out the game over music while the game is running.
+        """
+
+        s.audio.fadeout_music(1)
+
+    def update(self) -> None:
+        """
+        Updates the game state and the physics for one simulation step while the game is running.
+        """
+
+        self.profiler.run(self.update_stages)
+
+    def tick(self, key: Optional[List[bool]] = None) -> None:
+        """
+        Runs one simulation step of "s.dt" seconds, updating the game state and the physics.
+
+        Args:
+            key (List[bool]): The keys pressed during the step, read from the keyboard if not given.
+        """
+
+        self.key = pygame.key.get_pressed() if key is None else key
+        self.simulation_ticks += s.dt * 1000
+        if self.state is GameState.PLAYING:
+            self.update()
+            if self.mechanic.game_over:
+                self.end_game()
+        elif self.state is GameState.GAME_OVER:
+            self.update_game_over()
         else:
-            s.ELEVATOR.play()
+            self.restart_game()
+
+    def step(self, n_frames: int, inputs: Optional[Dict[int, bool]] = None) -> int:
+        """
+        Fast-forwards the game by a number of simulation steps without rendering anything or
+        reading the keyboard. The game runs on simulation time, so it can run faster than real time.
+
+        Args:
+            n_frames (int): The number of simulation steps to run.
+            inputs (Dict[int, bool]): The pygame keys held down during the steps. Keys that are
+            not given are not pressed.
+
+        Returns:
+            int: The score after the last step.
+        """
+
+        key = defaultdict(bool, inputs or {})
+        for _ in range(n_frames):
+            self.tick(key)
+        return self.mechanic.score
+
+    def render(self, alpha: float) -> None:
+        """
+        Renders the game elements on the screen.
+
+        Args:
+            alpha (float): How far the frame is between the last simulation step and the next one,
+            from 0 to 1.
+        """
+        
+        self.alpha = alpha
+        if self.state is GameState.PLAYING:
+            if self.drawn_state is not GameState.PLAYING:
+                self.dirty.mark_full()
+            self.profiler.run(self.render_stages)
+            self.drawn_state = GameState.PLAYING
+        elif self.drawn_state is not GameState.GAME_OVER:
+            # The game over screen doesn't change, so it is only composed and drawn once
+            self.game_over_frame = self.compose_game_over_frame()
+            s.audio.play_music("elevator")
+            self.dirty.mark_full()
             self.game_over_display()
-                
\ No newline at end of file
+            self.drawn_state = GameState.GAME_OVER
+
+        if self.profiler.overlay:
+            self.dirty.mark_all(self.profiler.draw(s.screen))
+        elif self.overlay_drawn:
+            # The overlay was hidden, so the screen under it is drawn and sent again
+            if self.state is not GameState.PLAYING:
+                self.game_over_display()
+            self.dirty.mark_full()
+        self.overlay_drawn = self.profiler.overlay
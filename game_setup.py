@@ -1,12 +1,17 @@
+import pickle
 import settings as s
 from pymunk import Space
 from game_components.walls import Walls
+from game_components.camera import Camera
 from game_components.character import Character
 from game_components.platform_manager import PlatformManager
 
 class GameSetup:
     """Class responsible for setting up the game environment.
     This includes adding the character, platforms, and walls into the pymunk space.
+
+    A snapshot of the whole world is taken once it is set up, and restarting the game restores
+    the snapshot, so every run starts from exactly the same state.
     """
 
     def __init__(self, space: Space) -> None:
@@ -20,23 +25,43 @@ class GameSetup:
         self.space = space
         self.space.gravity: tuple = s.GRAVITY
         self.space.damping: float = s.DAMPING
+        self.camera = Camera()
         self.character = Character(self.space)
-        self.platform_manager = PlatformManager(self.space)
+        self.platform_manager = PlatformManager(self.space, self.camera, s.PLATFORM_SEED)
         self.walls = Walls(self.space)
 
-        # Generate a list of tuples of the body and shapes of the platforms
+        # Generate the platforms of the start of the level and add them to the space
         self.platform_manager.generate_platform()
 
-        # Add platforms to the space
-        for body, platform in self.platform_manager.platforms:
-            self.space.add(body, platform)
-
         # Add character to the space
-        self.space.add(self.character.body, self.character.shape, self.character.sensor_shape)
+        self.space.add(self.character.body, self.character.shape)
 
         # Add walls to the space
         left_wall, right_wall = self.walls.create_walls()
-        self.space.add(left_wall, right_wall)
+        self.space.add(self.walls.body, left_wall, right_wall)
+
+        # Snapshot of the starting world
+        self.snapshot: bytes = self.take_snapshot()
+
+    def take_snapshot(self) -> bytes:
+        """
+        Take a snapshot of the space, the camera, the character, the platforms and the walls.
+        They are pickled together, so the references between them are kept.
+
+        Returns:
+            bytes: The snapshot of the world.
+        """
+
+        world = (self.space, self.camera, self.character, self.platform_manager, self.walls)
+        return pickle.dumps(world)
+
+    def restore_snapshot(self) -> None:
+        """
+        Replace the world with a copy of the snapshot taken when it was set up. The collision
+        handlers of the space are not part of the snapshot, they have to be added again.
+        """
+
+        self.space, self.camera, self.character, self.platform_manager, self.walls = pickle.loads(self.snapshot)
 
     def get_space(self) -> Space:
         """
@@ -67,3 +92,23 @@ class GameSetup:
         """
 
         return self.platform_manager
+
+    def get_camera(self) -> Camera:
+        """
+        Get the Camera object representing the view of the game world.
+
+        Returns:
+            A Camera object representing the view of the game world.
+        """
+
+        return self.camera
+
+    def get_walls(self) -> Walls:
+        """
+        Get the Walls object responsible for the walls of the game.
+
+        Returns:
+            A Walls object responsible for the walls of the game.
+        """
+
+        return self.walls
@@ -1,67 +1,290 @@
 import os
+import time
 import pygame
-from typing import Tuple
+import settings as s
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from asset_cache import AssetBundle
+from typing import Dict, Iterable, List, Optional, Tuple
 
-pygame.init()
+class ScaleCache:
+    """
+    Bounded least recently used cache of scaled surfaces.
 
-class Images:
-    """Class responsible for loading all the images."""
+    Attributes:
+        max_size (int): The maximum number of scaled surfaces kept in the cache.
+        hits (int): The number of lookups served from the cache.
+        misses (int): The number of lookups that had to scale the surface.
+    """
+
+    def __init__(self, max_size: int = 64) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size (int): The maximum number of scaled surfaces kept in the cache.
+        """
+
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self.surfaces: OrderedDict = OrderedDict()
+
+    def get(self, img: pygame.Surface, size: Tuple[int, int]) -> pygame.Surface:
+        """
+        Return the image scaled to the given size, scaling it only on a cache miss.
+
+        Args:
+            img (pygame.Surface): The source image.
+            size (Tuple[int, int]): The target width and height.
+
+        Returns:
+            pygame.Surface: The scaled image.
+        """
+
+        key = (img, size)
+        scaled = self.surfaces.get(key)
+        if scaled is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return scaled
+
+        self.misses += 1
+        scaled = pygame.transform.scale(img, size)
+        self.surfaces[key] = scaled
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False) # Evict the least recently used surface
+        return scaled
+
+    def clear(self) -> None:
+        """Remove all the scaled surfaces and reset the counters."""
+
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+class AssetRegistry:
+    """
+    Registry of the images of the game.
+
+    Images are loaded the first time they are used and converted to the pixel format of the
+    display once, so they are not converted every time they are drawn. Images with transparency
+    keep their alpha channel. Images are read from the asset bundle if it was built, otherwise
+    they can be decoded ahead of time on a thread pool. They are converted on the main thread
+    when they are first used.
+
+    Attributes:
+        images (Dict[str, Tuple[str, bool]]): The file in the img folder of each image, and True if it is transparent.
+        surfaces (Dict[str, pygame.Surface]): The images that were loaded.
+        pending (Dict[str, Future]): The images that are being decoded on a thread pool.
+        scaled (Dict[Tuple[str, int, int], pygame.Surface]): The pre-scaled images, keyed on the image name, width and height.
+        bundle (Optional[AssetBundle]): The asset bundle the images are read from.
+        load_times (Dict[str, float]): The time in seconds it took to load and convert each image.
+    """
+
+    def __init__(self, images: Dict[str, Tuple[str, bool]], bundle: Optional[AssetBundle] = None) -> None:
+        """
+        Initialize the registry without loading any image.
+
+        Args:
+            images (Dict[str, Tuple[str, bool]]): The file in the img folder of each image, and True if it is transparent.
+            bundle (Optional[AssetBundle]): The asset bundle the images are read from.
+        """
+
+        self.images = images
+        self.surfaces: Dict[str, pygame.Surface] = {}
+        self.pending: Dict[str, Future] = {}
+        self.scaled: Dict[Tuple[str, int, int], pygame.Surface] = {}
+        self.bundle = bundle
+        self.load_times: Dict[str, float] = {}
+
+    def decode(self, name: str) -> Tuple[pygame.Surface, float]:
+        """
+        Decode an image from the asset bundle, or from its file if it is not in the bundle.
+
+        Args:
+            name (str): The name of the image.
+
+        Returns:
+            Tuple[pygame.Surface, float]: The image and the time in seconds it took to decode it.
+        """
+
+        start = time.perf_counter()
+        surface = self.bundle.image(name) if self.bundle is not None else None
+        if surface is None:
+            surface = pygame.image.load(os.path.join("img", self.images[name][0]))
+        return surface, time.perf_counter() - start
+
+    def preload(self, executor: Executor, names: Optional[Iterable[str]] = None) -> List[Future]:
+        """
+        Start decoding images that are not in the asset bundle on a thread pool.
+
+        Args:
+            executor (Executor): The thread pool to decode the images on.
+            names (Iterable[str]): The names of the images to decode, every image if not given.
+
+        Returns:
+            List[Future]: The images being decoded.
+        """
+
+        futures = []
+        for name in self.images if names is None else names:
+            if self.bundle is not None and self.bundle.has_image(name):
+                continue # Reading an image from the bundle doesn't decode it
+            if name not in self.surfaces and name not in self.pending:
+                self.pending[name] = executor.submit(self.decode, name)
+            if name in self.pending:
+                futures.append(self.pending[name])
+        return futures
+
+    def get_scaled(self, name: str, size: Tuple[int, int]) -> Optional[pygame.Surface]:
+        """
+        Return an image that was scaled ahead of time, reading it from the asset bundle on first use.
 
-    def __init__(self) -> None:
-        """Initialize the Images class and load all the images."""
+        Args:
+            name (str): The name of the image.
+            size (Tuple[int, int]): The width and height of the image.
+
+        Returns:
+            Optional[pygame.Surface]: The image in the pixel format of the display, or None if it is not in the asset bundle.
+        """
 
-        self.character_img, self.character_jumpimg, self.character_gg = self.load_character()
-        self.earth_platform, self.lava_platform, self.water_platform, self.air_platform = self.load_platform()
-        self.wall_left_img, self.wall_right_img = self.load_wall()
-        self.bg, self.bg2 = self.load_background()
+        key = (name, *size)
+        scaled = self.scaled.get(key)
+        if scaled is None and self.bundle is not None:
+            start = time.perf_counter()
+            scaled = self.bundle.image(AssetBundle.scaled_name(name, size))
+            if scaled is not None:
+                scaled = self.scaled[key] = scaled.convert_alpha(s.screen)
+                self.load_times[AssetBundle.scaled_name(name, size)] = time.perf_counter() - start
+        return scaled
 
-    def load_character(self) -> Tuple[pygame.Surface, pygame.Surface, pygame.Surface]:
+    def get(self, name: str) -> pygame.Surface:
         """
-        Load character images.
+        Return an image, loading and converting it on first use.
+
+        Args:
+            name (str): The name of the image.
 
         Returns:
-            Tuple of character images.
+            pygame.Surface: The image in the pixel format of the display.
         """
 
-        character_img = pygame.image.load(os.path.join("img", "micheal_scott.png"))
-        character_jumpimg = pygame.image.load(os.path.join("img","micheal_scott_jump.png"))
-        character_gg = pygame.image.load(os.path.join("img","micheal_scott_gg.png"))
-        return character_img, character_jumpimg, character_gg
-    
-    def load_platform(self) -> Tuple[pygame.Surface, pygame.Surface, pygame.Surface, pygame.Surface]:
+        surface = self.surfaces.get(name)
+        if surface is None:
+            # Wait for the image if it is being decoded, otherwise decode it now
+            future = self.pending.pop(name, None)
+            surface, decode_time = self.decode(name) if future is None else future.result()
+            start = time.perf_counter()
+            surface = surface.convert_alpha(s.screen) if self.images[name][1] else surface.convert(s.screen)
+            self.load_times[name] = decode_time + time.perf_counter() - start
+            self.surfaces[name] = surface
+        return surface
+
+    def report(self) -> List[str]:
         """
-        Load platform images.
+        Creates the report of the images that were loaded.
 
         Returns:
-            Tuple of platform images.
+            List[str]: One line for each image with its load time in milliseconds.
         """
 
-        earth_platform = pygame.image.load(os.path.join("img","earth_platform.png"))
-        lava_platform = pygame.image.load(os.path.join("img","lava_platform.png"))
-        water_platform = pygame.image.load(os.path.join("img","water_platform.png"))
-        air_platform = pygame.image.load(os.path.join("img","air_platform.png"))
-        return earth_platform, lava_platform, water_platform, air_platform
-    
-    def load_wall(self) -> Tuple:
-        wall_left_img = pygame.image.load(os.path.join("img","rock_wall_left.png"))
-        wall_right_img = pygame.image.load(os.path.join("img","rock_wall_right.png"))
-        return wall_left_img, wall_right_img
-    
-    def load_background(self) -> Tuple[pygame.Surface, pygame.Surface]:
+        lines = [f"{'asset':<32}{'load':>8}  (ms)"]
+        for name, seconds in self.load_times.items():
+            lines.append(f"{name:<32}{seconds * 1000:>8.3f}")
+        return lines
+
+class Images:
+    """
+    Class responsible for the images of the game.
+
+    The images are read from an asset registry when they are used, so they are only loaded and
+    converted once even if more than one Images instance is created.
+    """
+
+    def __init__(self, registry: Optional[AssetRegistry] = None) -> None:
         """
-        Load wall images.
+        Initialize the Images class.
+
+        Args:
+            registry (AssetRegistry): The registry to read the images from, the shared registry if not given.
+        """
+
+        self.registry = assets if registry is None else registry
+        self.scale_cache = ScaleCache(s.SCALE_CACHE_SIZE)
+
+    @property
+    def character_img(self) -> pygame.Surface:
+        """The character image."""
+
+        return self.registry.get("character")
+
+    @property
+    def character_jumpimg(self) -> pygame.Surface:
+        """The character image while jumping."""
+
+        return self.registry.get("character_jump")
+
+    @property
+    def character_gg(self) -> pygame.Surface:
+        """The character image of the game over screen."""
+
+        return self.registry.get("character_gg")
+
+    @property
+    def wall_left_img(self) -> pygame.Surface:
+        """The left wall image."""
+
+        return self.registry.get("wall_left")
+
+    @property
+    def wall_right_img(self) -> pygame.Surface:
+        """The right wall image."""
+
+        return self.registry.get("wall_right")
+
+    @property
+    def bg(self) -> pygame.Surface:
+        """The first background image."""
+
+        return self.registry.get("background1")
+
+    @property
+    def bg2(self) -> pygame.Surface:
+        """The second background image."""
+
+        return self.registry.get("background2")
+
+    @property
+    def element_platforms(self) -> Tuple[pygame.Surface, pygame.Surface, pygame.Surface, pygame.Surface]:
+        """Platform images in the order the elements appear as the player climbs."""
+
+        return tuple(self.registry.get(name) for name in s.ELEMENT_PLATFORMS)
+
+    def sprite(self, name: str, width: int, height: int) -> pygame.Surface:
+        """
+        Get an image scaled to the given width and height, from the asset cache if it was scaled
+        ahead of time.
+
+        Args:
+            name: Name of the image in the asset registry.
+            width: Width of the scaled image.
+            height: Height of the scaled image.
 
         Returns:
-            Tuple of images.
+            Scaled image.
         """
 
-        bg = pygame.image.load(os.path.join("img","background1.png")).convert()
-        bg2 = pygame.image.load(os.path.join("img","background2.png")).convert()
-        return bg, bg2
+        size = (round(width), round(height))
+        scaled = self.registry.get_scaled(name, size)
+        if scaled is None:
+            scaled = self.scale_cache.get(self.registry.get(name), size)
+        return scaled
 
     def scale_images(self, img: pygame.Surface, img_width: int, img_height: int) -> pygame.Surface:
         """
-        Scale images to the given width and height.
+        Scale images to the given width and height. Scaled images are cached so the same image
+        and size are only scaled once.
 
         Args:
             img: Image to be scaled
@@ -72,5 +295,22 @@ class Images:
             Scaled image.
         """
         
-        img = pygame.transform.scale(img, (img_width, img_height))
-        return img
+        return self.scale_cache.get(img, (round(img_width), round(img_height)))
+
+    def platform_sprite(self, tier: int, width: int, height: int) -> pygame.Surface:
+        """
+        Get the platform image of an element tier scaled to the size of a platform.
+
+        Args:
+            tier: Index of the element in "s.ELEMENT_PLATFORMS".
+            width: Width of the platform.
+            height: Height of the platform.
+
+        Returns:
+            Scaled platform image.
+        """
+
+        return self.sprite(s.ELEMENT_PLATFORMS[tier], width, height)
+
+# Shared registry of the images of the game
+assets = AssetRegistry(s.IMAGES)
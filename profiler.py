@@ -0,0 +1,188 @@
+"""
+Frame profiler.
+
+Records the wall time of every stage of a frame in fixed-size ring buffers and
+reports the 50th, 95th and 99th percentile of each stage. The time the frame
+loop sleeps to limit the frame rate is left out of the frame time. The report can be
+drawn on the screen as an overlay or written to a file. While the profiler is
+disabled the stages are called directly and nothing is recorded.
+"""
+
+import time
+import pygame
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class FrameProfiler:
+    """
+    Class responsible for measuring how long each stage of a frame takes.
+
+    Attributes:
+        enabled (bool): True if the stages are being measured.
+        overlay (bool): True if the report is drawn on the screen.
+        size (int): The number of samples kept for each stage.
+        samples (Dict[str, array]): The ring buffer of samples of each stage, in seconds.
+        counts (Dict[str, int]): The number of samples recorded for each stage.
+        frame_start (float): The time the current frame started.
+        idle_time (float): The time the current frame spent waiting, left out of the frame time.
+    """
+
+    def __init__(self, enabled: bool = False, size: int = 600) -> None:
+        """
+        Initializes the FrameProfiler class.
+
+        Args:
+            enabled (bool): True to start measuring the stages.
+            size (int): The number of samples kept for each stage.
+        """
+
+        self.enabled: bool = enabled
+        self.overlay: bool = False
+        self.size: int = size
+        self.samples: Dict[str, array] = {}
+        self.counts: Dict[str, int] = {}
+        self.frame_start: float = 0.0
+        self.idle_time: float = 0.0
+        self.font: Optional[pygame.font.Font] = None
+        self.overlay_lines: List[pygame.Surface] = []
+        self.overlay_frames: int = 0
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Records a sample of a stage, overwriting the oldest sample once the buffer is full.
+
+        Args:
+            stage (str): The name of the stage.
+            seconds (float): How long the stage took.
+        """
+
+        buffer = self.samples.get(stage)
+        if buffer is None:
+            buffer = self.samples[stage] = array("d", [0.0]) * self.size
+            self.counts[stage] = 0
+        buffer[self.counts[stage] % self.size] = seconds
+        self.counts[stage] += 1
+
+    def run(self, stages: List[Tuple[str, Callable[[], None]]]) -> None:
+        """
+        Calls each stage in order, measuring them if the profiler is enabled.
+
+        Args:
+            stages (List[Tuple[str, Callable[[], None]]]): The names and functions of the stages.
+        """
+
+        if not self.enabled:
+            for _, stage in stages:
+                stage()
+            return
+
+        for name, stage in stages:
+            start = time.perf_counter()
+            stage()
+            self.record(name, time.perf_counter() - start)
+
+    def begin_frame(self) -> None:
+        """Marks the start of a frame."""
+
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+            self.idle_time = 0.0
+
+    def idle(self, wait: Callable[..., Any], *args: Any) -> Any:
+        """
+        Calls a function that waits, like the clock limiting the frame rate, and leaves the time it
+        takes out of the frame time.
+
+        Args:
+            wait (Callable[..., Any]): The function that waits.
+            *args (Any): The arguments of the function.
+
+        Returns:
+            Any: The return value of the function.
+        """
+
+        if not self.enabled:
+            return wait(*args)
+
+        start = time.perf_counter()
+        result = wait(*args)
+        self.idle_time += time.perf_counter() - start
+        return result
+
+    def end_frame(self) -> None:
+        """Records the time since the start of the frame, without the idle time, as the "frame" stage."""
+
+        if self.enabled:
+            self.record("frame", time.perf_counter() - self.frame_start - self.idle_time)
+
+    def percentiles(self, stage: str) -> Tuple[float, float, float]:
+        """
+        Gets the 50th, 95th and 99th percentile of the samples of a stage.
+
+        Args:
+            stage (str): The name of the stage.
+
+        Returns:
+            Tuple[float, float, float]: The percentiles in seconds.
+        """
+
+        count = min(self.counts.get(stage, 0), self.size)
+        if count == 0:
+            return 0.0, 0.0, 0.0
+        values = sorted(self.samples[stage][:count])
+        return tuple(values[min(count - 1, int(count * p))] for p in (0.50, 0.95, 0.99))
+
+    def report(self) -> List[str]:
+        """
+        Creates the report of every stage.
+
+        Returns:
+            List[str]: One line for each stage with its percentiles in milliseconds.
+        """
+
+        lines = [f"{'stage':<32}{'p50':>8}{'p95':>8}{'p99':>8}  (ms)"]
+        for stage in self.samples:
+            p50, p95, p99 = self.percentiles(stage)
+            lines.append(f"{stage:<32}{p50 * 1000:>8.3f}{p95 * 1000:>8.3f}{p99 * 1000:>8.3f}")
+        return lines
+
+    def dump(self, path: str = "profile.txt", extra: Optional[List[str]] = None) -> None:
+        """
+        Writes the report to a file.
+
+        Args:
+            path (str): The file to write the report to.
+            extra (List[str]): More lines written after the report.
+        """
+
+        lines = self.report() + ([""] + extra if extra else [])
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def toggle_overlay(self) -> None:
+        """Shows or hides the overlay. Showing the overlay also enables the profiler."""
+
+        self.overlay = not self.overlay
+        if self.overlay:
+            self.enabled = True
+
+    def draw(self, screen: pygame.Surface) -> List[pygame.Rect]:
+        """
+        Draws the report on the screen. The report is only created and rendered again every 30
+        frames.
+
+        Args:
+            screen (pygame.Surface): The surface to draw the report on.
+
+        Returns:
+            List[pygame.Rect]: The regions of the screen the report was drawn in.
+        """
+
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.Font(None, 20)
+        if self.overlay_frames % 30 == 0:
+            self.overlay_lines = [self.font.render(line, True, (255, 255, 255), (0, 0, 0)) for line in self.report()]
+        self.overlay_frames += 1
+
+        return [screen.blit(text, (10, 100 + i * 16)) for i, text in enumerate(self.overlay_lines)]
@@ -1,11 +1,17 @@
-import os
 import sys
 import pygame
 import pymunk
 import settings as s
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import List, Union
 from game_setup import GameSetup
-from game_manager import GameManager
+from game_manager import GameManager, GameState
+from profiler import FrameProfiler
+from dirty_region import DirtyRegion
+from text_cache import text_cache
+from images import assets
+from asset_cache import AssetBundle
 
 def handle_events(event: pygame.event.Event, key: Union[bool, int]) -> bool:
     """ 
@@ -24,6 +30,35 @@ def handle_events(event: pygame.event.Event, key: Union[bool, int]) -> bool:
         sys.exit()
     return True
 
+def handle_profiler_keys(event: pygame.event.Event, profiler: FrameProfiler) -> None:
+    """
+    Handle the keys that show the profiler overlay and write the profiler report.
+
+    Args:
+        event (pygame.event.Event): Pygame event instance.
+        profiler (FrameProfiler): The profiler of the game.
+    """
+
+    if event.type == pygame.KEYDOWN:
+        if event.key == s.PROFILE_OVERLAY_KEY:
+            profiler.toggle_overlay()
+        elif event.key == s.PROFILE_DUMP_KEY:
+            profiler.dump(s.PROFILE_FILE, assets.report())
+
+def handle_game_over_keys(event: pygame.event.Event, game_manager: GameManager) -> None:
+    """
+    Handle the key presses on the game over screen. The game over screen is updated from the key
+    press itself, because the key can be released before the next simulation step reads the
+    keyboard.
+
+    Args:
+        event (pygame.event.Event): Pygame event instance.
+        game_manager (GameManager): The game manager of the game.
+    """
+
+    if game_manager.state is GameState.GAME_OVER and event.type == pygame.KEYDOWN:
+        game_manager.tick(defaultdict(bool, {event.key: True}))
+
 def handle_input(key: Union[bool, int], selected_item: int, menu_items: List[str]) -> int:
     """
     Handle the user input for menu navigation.
@@ -71,13 +106,112 @@ def handle_return_key(key: Union[bool, int], selected_item: int, menu_items: Lis
     """
     
     if key[pygame.K_RETURN]:
-        s.PARKOUR_SOUND.play()
+        s.audio.play("parkour")
         return get_menu_item(selected_item, menu_items)
     
+def draw_loading_screen(loaded: int, total: int) -> None:
+    """
+    Draw the loading screen.
+
+    Args:
+        loaded (int): The number of assets that are loaded.
+        total (int): The number of assets the loading screen waits for.
+    """
+
+    s.screen.fill(s.BLACK)
+    loading = text_cache.render(s.general_font, f"Loading {loaded}/{total}", s.WHITE)
+    s.screen.blit(loading, loading.get_rect(center=(s.WIDTH/2, s.HEIGHT/2)))
+    pygame.display.update()
+
+def wait_for_assets(futures: List[Future]) -> None:
+    """
+    Display the loading screen until the assets are loaded.
+
+    Args:
+        futures (List[Future]): The assets being loaded.
+    """
+
+    not_done = futures
+    while not_done:
+        draw_loading_screen(len(futures) - len(not_done), len(futures))
+        pygame.event.pump()
+        not_done = wait(not_done, timeout=1/30).not_done
+
+def load_assets() -> None:
+    """
+    Open the asset bundle and decode the assets that are not in it on a thread pool while the
+    loading screen is displayed.
+
+    The bundle is built first if it was not built for the current resolution and assets. The
+    loading screen is only displayed until the images the main menu needs are loaded, the other
+    assets keep loading in the background and are waited for when they are first used.
+    """
+
+    executor = ThreadPoolExecutor(max_workers=s.LOADER_THREADS)
+    if s.bundle is None:
+        s.init_mixer()
+        wait_for_assets([executor.submit(AssetBundle().build)])
+        s.bundle = AssetBundle().open()
+    assets.bundle = s.bundle
+
+    # Assets that are not in the bundle are decoded from their files
+    first_assets = assets.preload(executor, s.FIRST_ASSETS)
+    assets.preload(executor)
+    s.audio.preload(executor)
+    executor.shutdown(wait=False) # The submitted assets are still loaded
+    wait_for_assets(first_assets)
+
+def compose_main_menu() -> pygame.Surface:
+    """
+    Compose the parts of the main menu that never change: the background, the title and the
+    controls tutorial.
+
+    Returns:
+        pygame.Surface: The static menu frame.
+    """
+
+    menu_frame = assets.get("main_menu_background").copy()
+
+    game_title = text_cache.render(s.title_font, "PARKOUR", s.WHITE)
+    menu_frame.blit(game_title, (s.WIDTH*0.12,s.HEIGHT*0.40))
+
+    # Controls tutorial
+    move_keys = text_cache.render(s.general_font, "Press arrow keys to move and space to jump", s.WHITE)
+    menu_frame.blit(move_keys, (s.WIDTH*0.35,s.HEIGHT*0.60))
+    jump_key = text_cache.render(s.general_font, "Space", s.YELLOW)
+    menu_frame.blit(jump_key, (s.WIDTH*0.70,s.HEIGHT*0.52))
+    return menu_frame
+
+def draw_menu_items(selected_item: int, menu_items: List[str]) -> List[pygame.Rect]:
+    """
+    Draw the menu items with the selected item highlighted.
+
+    Args:
+        selected_item (int): Currently selected menu item.
+        menu_items (List[str]): List of menu items.
+
+    Returns:
+        List[pygame.Rect]: The regions of the screen the menu items were drawn in.
+    """
+
+    rects = []
+    for i, item in enumerate(menu_items):
+        if i == selected_item:
+            text = text_cache.render(s.general_font, item, s.WHITE)
+            pygame.draw.rect(s.screen, s.YELLOW, text.get_rect(center=(s.WIDTH*0.20, s.HEIGHT/2 + i * 50)), 2)
+        else:
+            text = text_cache.render(s.general_font, item, s.GREY)
+        rect = s.screen.blit(text, text.get_rect(center=(s.WIDTH*0.20, s.HEIGHT/2 + i * 50)))
+        rects.append(rect.inflate(4, 4)) # Include the selection outline
+    return rects
+    
 def main_menu() -> str:
     """ 
     Display the main menu and handle user interaction.
 
+    The menu is drawn once and then waits for events, it is only drawn again when the selection
+    changes.
+
     Returns:
         str: Selected menu item.
     """
@@ -86,43 +220,33 @@ def main_menu() -> str:
     menu_items = ["start", "exit"]
     selected_item = 0
 
+    menu_frame = compose_main_menu()
+    s.screen.blit(menu_frame, (0,0))
+    draw_menu_items(selected_item, menu_items)
+    dirty = DirtyRegion()
+    dirty.update_display()
+
     run = True
     while run:
-        main_menu_bg = pygame.image.load(os.path.join("img","background_main_menu.png")).convert()
-        s.screen.blit(main_menu_bg, (0,0))
-
-        for event in pygame.event.get():
-
-            key = pygame.key.get_pressed()
-
-            handle_events(event, key)
+        event = pygame.event.wait()
+        key = pygame.key.get_pressed()
 
-            selected_item = handle_input(key, selected_item, menu_items)
+        handle_events(event, key)
+        if event.type != pygame.KEYDOWN:
+            continue
 
-            return_item = handle_return_key(key, selected_item, menu_items)
-            if return_item:
-                return return_item
+        previous_item = selected_item
+        selected_item = handle_input(key, selected_item, menu_items)
 
-        game_title = s.title_font.render("PARKOUR", True, s.WHITE)
-        s.screen.blit(game_title, (s.WIDTH*0.12,s.HEIGHT*0.40))
-        
-        for i, item in enumerate(menu_items):
-            if i == selected_item:
-                text = s.general_font.render(item, True, s.WHITE)
-                pygame.draw.rect(s.screen, s.YELLOW, text.get_rect(center=(s.WIDTH*0.20, s.HEIGHT/2 + i * 50)), 2)
-            else:
-                text = s.general_font.render(item, True,s.GREY)
-            s.screen.blit(text, text.get_rect(center=(s.WIDTH*0.20, s.HEIGHT/2 + i * 50)))
-        
-        # Controls tutorial
-        move_keys = s.general_font.render("Press arrow keys to move and space to jump", True, s.WHITE)
-        s.screen.blit(move_keys, (s.WIDTH*0.35,s.HEIGHT*0.60))
-        jump_key = s.general_font.render("Space", True, s.YELLOW)
-        s.screen.blit(jump_key, (s.WIDTH*0.70,s.HEIGHT*0.52))
+        return_item = handle_return_key(key, selected_item, menu_items)
+        if return_item:
+            return return_item
 
         # Rendering
-        s.clock.tick(s.FPS) 
-        pygame.display.update()
+        if selected_item != previous_item:
+            s.screen.blit(menu_frame, (0,0))
+            dirty.mark_all(draw_menu_items(selected_item, menu_items))
+            dirty.update_display()
         
     pygame.quit()
 
@@ -137,22 +261,38 @@ def start_game() -> None:
     game_manager = GameManager(game_setup)
     game_manager.update_collision()
 
+    # Time that has passed but has not been simulated yet
+    accumulator = 0.0
+
     run = True
     while run:
+        if game_manager.state is GameState.GAME_OVER:
+            # Nothing changes on the game over screen, so wait for an event instead of drawing frames
+            pygame.event.post(pygame.event.wait())
+            s.clock.tick()
+
+        game_manager.profiler.begin_frame()
         for event in pygame.event.get():
             key = pygame.key.get_pressed()
             handle_events(event, key)
-            
-        # game running
-        game_manager.run_game()
+            handle_profiler_keys(event, game_manager.profiler)
+            handle_game_over_keys(event, game_manager)
 
-        # Rendering
-        s.clock.tick(s.FPS) 
-        pygame.display.update()
+        key = pygame.key.get_pressed()
+        game_manager.quit_game(key)
+
+        frame_time = min(game_manager.profiler.idle(s.clock.tick, s.FPS) / 1000, s.MAX_FRAME_TIME)
+        accumulator += frame_time
 
-        # Update physics
-        for x in range(1):
-            space.step(s.dt)
+        # Update the game state and physics in fixed steps
+        while accumulator >= s.dt:
+            game_manager.tick(key)
+            accumulator -= s.dt
+
+        # Rendering
+        game_manager.render(accumulator / s.dt)
+        game_manager.update_display()
+        game_manager.profiler.end_frame()
 
     pygame.quit()
 
@@ -160,6 +300,7 @@ def main() -> None:
     """
     Main function to run the game.
     """
+    load_assets()
     selected_item = main_menu()
 
     while selected_item != "exit":
@@ -171,6 +312,7 @@ def main() -> None:
     pygame.quit()             
 
 if __name__ == "__main__":
+    s.init_mixer() # Before pygame.init, which would start the mixer in its default format
     pygame.init()                               
     main()
     sys.exit()
\ No newline at end of file
@@ -30,6 +30,9 @@ RIGHT_WALL_WIDTH: int = s.WIDTH
 MIN_PLATFORM_SIZE: int = round(s.WIDTH * 0.234)
 MAX_PLATFORM_SIZE: int = round(s.WIDTH * 0.375)
 PLATFORM_THICKNESS: int = s.WIDTH * 0.02
+# Platform widths are a multiple of the step, so their sprites can be scaled ahead of time
+PLATFORM_WIDTH_STEP: int = round(s.WIDTH * 0.008)
+PLATFORM_WIDTHS: range = range(MIN_PLATFORM_SIZE, MAX_PLATFORM_SIZE + 1, PLATFORM_WIDTH_STEP)
 PLATFORM_DISTANCE: float = round(s.HEIGHT / 5)
 
 # The starting y position of the first platform based on the display height
@@ -2,13 +2,20 @@
 All constant variables that are used in more than one class, function or
 file is stored here, these are not to be changed. Some extra settings 
 included are the pygame display, gravity, and physics settings.
+
+Importing this module has no side effects. The display, fonts and sounds are
+created the first time they are used. Set the PARKOUR_HEADLESS environment
+variable to 1 to use the dummy video and audio drivers.
 """
 
 import os
 import pygame
 
-pygame.init()
-pygame.mixer.init()
+# Headless mode
+HEADLESS: bool = os.environ.get("PARKOUR_HEADLESS", "0") == "1"
+if HEADLESS:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
 
 # Screen settings
 WIDTH: int = 1280
@@ -16,10 +23,15 @@ HEIGHT: int = 800
 
 # Display settings
 FLAGS = pygame.FULLSCREEN # Sets the display to fullscreen mode
-# Fullscreen mode
-# screen = pygame.display.set_mode((WIDTH, HEIGHT), flags=FLAGS)
-# Windowed mode
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+
+def load_screen() -> pygame.Surface:
+    """Initialize the display and return the screen surface."""
+
+    pygame.display.init()
+    # Fullscreen mode
+    # return pygame.display.set_mode((WIDTH, HEIGHT), flags=FLAGS)
+    # Windowed mode
+    return pygame.display.set_mode((WIDTH, HEIGHT))
 
 # Physics settings
 GRAVITY: tuple = (0, 2000.0)
@@ -33,24 +45,115 @@ GREY: tuple[int, int, int] = (128,128,128)
 YELLOW: tuple[int, int, int]   = (244, 224, 36)
 BURGANDY: tuple[int, int, int]  = (84, 21, 46)
 
-# Number of platforms that are pre-spawned
-NUMBER_OF_PLATFORMS: int = 100
+# Platform streaming, platforms are generated in chunks up to the spawn distance above the top of the screen
+PLATFORMS_PER_CHUNK: int = 5
+SPAWN_DISTANCE: int = HEIGHT
+SHAPE_DISTANCE: int = HEIGHT // 2 # Platforms only get a body and shape in the space up to this distance above the character
+RANDOM_BLOCK_CHUNKS: int = 32 # Chunks of platform positions and sizes drawn from the random generator at once
+PLATFORM_SEED = None # Seed of the platform layout, None for a different layout every time the game starts
+
+# Number of scaled images kept in memory, enough for every platform width in every element
+SCALE_CACHE_SIZE: int = 128
+
+# Images, the file in the img folder of each image and True if it is transparent
+IMAGES: dict = {
+    "character": ("micheal_scott.png", True),
+    "character_jump": ("micheal_scott_jump.png", True),
+    "character_gg": ("micheal_scott_gg.png", True),
+    "earth_platform": ("earth_platform.png", True),
+    "lava_platform": ("lava_platform.png", True),
+    "water_platform": ("water_platform.png", True),
+    "air_platform": ("air_platform.png", True),
+    "wall_left": ("rock_wall_left.png", True),
+    "wall_right": ("rock_wall_right.png", True),
+    "background1": ("background1.png", False),
+    "background2": ("background2.png", False),
+    "main_menu_background": ("background_main_menu.png", False),
+}
+
+# Platform images in the order the elements appear as the player climbs
+ELEMENT_PLATFORMS: tuple = ("earth_platform", "water_platform", "lava_platform", "air_platform")
+
+# The asset bundle is stored in a directory for each version of the bundle format, resolution and source files
+ASSET_CACHE_DIR: str = os.path.join("cache", "assets")
+ASSET_CACHE_VERSION: int = 2
+
+def load_bundle():
+    """Return the opened asset bundle of the configured resolution, or None if it was not built."""
+
+    from asset_cache import AssetBundle
+    return AssetBundle().open()
+
+# Images the main menu needs, the loading screen is displayed until they are loaded
+FIRST_ASSETS: tuple = ("main_menu_background",)
+LOADER_THREADS: int = 4 # Number of threads that decode the images and sounds
 
 # Fonts
-general_font = pygame.font.Font("fonts/ARCADE.TTF", 36)
-title_font = pygame.font.Font("fonts/ARCADE.TTF", 56)
+FONT_PATH: str = os.path.join("fonts", "ARCADE.TTF")
+
+def load_font(size: int) -> pygame.font.Font:
+    """Initialize the font module and return the game font in the given size."""
+
+    pygame.font.init()
+    # The font is read from the asset bundle if it was opened
+    bundle = globals().get("bundle")
+    font = bundle.font(FONT_PATH, size) if bundle is not None else None
+    return font if font is not None else pygame.font.Font(FONT_PATH, size)
 
 # Rendering settings
 clock = pygame.time.Clock()
-FPS: int = 60 # Frames per second
-dt: float = 1.0/60.0 # Delta time
+FPS: int = 60 # Frames per second, 0 to not limit the frame rate
+dt: float = 1.0/60.0 # Delta time of a simulation step, independent of the frame rate
+PHYSICS_SUBSTEPS: int = 1 # Number of physics steps each simulation step is split into
+MAX_FRAME_TIME: float = 0.25 # Longest frame time in seconds that is simulated, so slow frames don't pile up steps
+
+# Profiler settings, set the PARKOUR_PROFILE environment variable to 1 to measure every frame
+PROFILE: bool = os.environ.get("PARKOUR_PROFILE", "0") == "1"
+PROFILE_OVERLAY_KEY: int = pygame.K_F3 # Shows or hides the profiler overlay
+PROFILE_DUMP_KEY: int = pygame.K_F4 # Writes the profiler report to PROFILE_FILE
+PROFILE_FILE: str = "profile.txt"
 
 # Game settings
 START_TICKS: int = 0 # Starting time in-game
 
-# Sound settings
-pygame.mixer.pre_init(42000, -16, 2, 500)
-PARKOUR_SOUND = pygame.mixer.Sound(os.path.join("audio", "parkour!.mp3"))
-PARKOUR_SOUND.set_volume(10)
-ELEVATOR = pygame.mixer.Sound(os.path.join("audio", ("elevator_music.mp3")))
-ELEVATOR.set_volume(0.3)
\ No newline at end of file
+# Sound settings, the file in the audio folder and the volume of each sound
+SOUNDS: dict = {
+    "parkour": ("parkour!.mp3", 10),
+}
+MUSIC: dict = {
+    "elevator": ("elevator_music.mp3", 0.3),
+}
+SOUND_COOLDOWN: int = 500 # Time in milliseconds a sound is not played again after it starts
+MIXER_FORMAT: tuple = (42000, -16, 2) # Frequency, sample size and number of channels of the mixer
+MIXER_BUFFER: int = 500
+
+def init_mixer() -> None:
+    """Initialize the mixer in the game's format, if it is not initialized yet."""
+
+    if not pygame.mixer.get_init():
+        pygame.mixer.pre_init(*MIXER_FORMAT, MIXER_BUFFER)
+        pygame.mixer.init()
+
+def load_audio():
+    """Return the audio manager of the game."""
+
+    from audio import load_audio
+    return load_audio()
+
+# Settings that are created the first time they are used
+LAZY_SETTINGS: dict = {
+    "screen": load_screen,
+    "general_font": lambda: load_font(36),
+    "title_font": lambda: load_font(56),
+    "audio": load_audio,
+    "bundle": load_bundle,
+}
+
+def __getattr__(name: str):
+    """Create a lazy setting on first use and keep it as a module attribute."""
+
+    if name in LAZY_SETTINGS:
+        value = LAZY_SETTINGS[name]()
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
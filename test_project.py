@@ -5,20 +5,38 @@ It includes tests for character movement, collision detection, camera scrolling,
 and game events.
 """
 
+import os
+import time
+import pickle
 import pytest
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+import numpy as np
 import pymunk
 import pygame
 from pygame.locals import *
 from unittest.mock import patch, Mock
+from typing import Tuple
 
+os.environ.setdefault("PARKOUR_HEADLESS", "1") # Use the dummy video and audio drivers
 import settings as s
+import scale_objects as so
 
 import project
+from game_setup import GameSetup
+from game_manager import GameManager, GameState
+from images import AssetRegistry, Images, ScaleCache
+from asset_cache import AssetBundle
+from profiler import FrameProfiler
+from audio import AudioManager
+from dirty_region import DirtyRegion
+from text_cache import HudText, TextCache
+from game_components.camera import Camera
 from game_components.character import Character
 from game_components.character import Movement
 from game_components.character import Jump
 from game_components.mechanics import Mechanics 
-from game_components.collision import Collision
+from game_components.collision import CHARACTER_CATEGORY, Collision
 from game_components.scroll_system import Scroll
 from game_components.platform_manager import PlatformManager
 
@@ -91,12 +109,55 @@ def test_handle_return_key() -> None:
     returned_item = project.handle_return_key({pygame.K_RETURN: 1}, selected_item, menu_items)
     assert returned_item == "exit"
 
+def one_way_platform(character_y: float) -> Tuple[Collision, Character]:
+    """
+    Create a space with a wide platform in the middle of the screen, and a character at a y position.
+
+    Args:
+        character_y (float): The y position of the character.
+
+    Returns:
+        Tuple[Collision, Character]: The collision object and the character.
+    """
+
+    space = pymunk.Space()
+    space.gravity = s.GRAVITY
+    space.damping = s.DAMPING
+    character = Character(space)
+    character.body.position = (s.WIDTH / 2, character_y)
+    space.add(character.body, character.shape)
+
+    body = pymunk.Body(body_type=pymunk.Body.KINEMATIC)
+    body.position = (s.WIDTH / 2, s.HEIGHT / 2)
+    segment = pymunk.Segment(body, (-s.WIDTH / 2, 0), (s.WIDTH / 2, 0), so.PLATFORM_THICKNESS)
+    segment.collision_type = 2
+    space.add(body, segment)
+
+    collision = Collision(space, character, [(body, segment)])
+    collision.assign_filters()
+    return collision, character
+
+def step_one_way_platform(collision: Collision, steps: int) -> None:
+    """
+    Run the physics of a one-way platform space, updating the platform filters before each step.
+
+    Args:
+        collision (Collision): The collision object of the space.
+        steps (int): The number of physics steps.
+    """
+
+    for _ in range(steps):
+        collision.update_platform_filters()
+        collision.space.step(s.dt)
+        collision.check_in_air()
+        collision.character.set_max_velocity()
+
 def test_character_to_platform_collision_up() -> None:
     """ 
     Test the character to platform upward collision.
 
-    This function tests the upward collision between the character and the platform by creating mock objects
-    and simulating the collision.
+    This function tests that the character passes through a platform above it at the maximum velocity, and
+    lands on top of it once it falls back down, from several start heights.
 
     Args:
         None
@@ -105,44 +166,29 @@ def test_character_to_platform_collision_up() -> None:
         None
     """
 
-    # Create a mock arbiter, space, and data
-    arbiter = Mock()
-    space = Mock()
-    data = Mock()
+    for offset in range(60, 400, 17):
+        collision, character = one_way_platform(s.HEIGHT / 2 + offset)
+        assert collision.solid_end == 0
 
-    # Create a mock platform
-    mock_platform_manager = Mock(spec=PlatformManager)
-    body = Mock(spec=pymunk.Body.KINEMATIC)
-    segment = Mock(spec=pymunk.Segment)
-    mock_platform_manager.create_platform.return_value = (body, segment)
-    mock_platform_body, mock_platform_shape = mock_platform_manager.create_platform()
-    mock_platform = mock_platform_body, mock_platform_shape
-    mock_platforms = [] 
-    mock_platforms.append(mock_platform)
+        # Jump through the platform at the maximum velocity
+        character.body.velocity = (0, -so.CHARACTER_MAX_VELOCITY_X)
+        step_one_way_platform(collision, 12)
+        assert character.body.position.y < s.HEIGHT / 2 - so.PLATFORM_THICKNESS
+        assert collision.solid_end == 1
+        assert collision.on_ground is False
 
-    # Create a mock character
-    mock_character = Mock(spec=Character)
-    mock_character.body = pymunk.Body(1,1)
-    mock_character.shape = pymunk.Poly.create_box(mock_character.body)
-
-    # Create a mock collision
-    mock_collision = Collision(space, mock_character, mock_platforms)
-    
-    mock_collision.add_collision_handlers()
-
-    # Apply an upward force to simulate the character jumping
-    mock_character.body.apply_impulse_at_local_point((0, -500), (0,0))
-
-    # When collide method is called, it should return False
-    assert mock_collision.collide(arbiter, space, data) == False
-    assert mock_collision.on_ground is False
+        # Land on top of the platform
+        step_one_way_platform(collision, 300)
+        assert character.body.position.y == pytest.approx(s.HEIGHT / 2 - so.PLATFORM_THICKNESS - character.height / 2, abs=1)
+        assert collision.on_ground is True
 
 def test_character_to_platform_collision_down() -> None:
     """
     Test the character to platform downward collision.
 
-    This function tests the downward collision between the character and the platform by creating mock objects
-    and simulating the collision.
+    This function tests that the character falling onto a platform at the maximum velocity lands on it instead
+    of passing through from several start heights, that the platform turns pass-through once the character is
+    below it, and that the platforms are forgotten when they are removed.
 
     Args:
         None
@@ -150,47 +196,33 @@ def test_character_to_platform_collision_down() -> None:
     Returns:
         None
     """
-    
-    mock_space = Mock(pymunk.Space)
-
-    # Create a mock arbiter, space, and data
-    arbiter = Mock()
-    space = Mock()
-    data = Mock()
-
-    # Create a mock platform
-    mock_platform_manager = Mock(spec=PlatformManager)
-    body = Mock(spec=pymunk.Body.KINEMATIC)
-    segment = Mock(spec=pymunk.Segment)
-    mock_platform_manager.create_platform.return_value = (body, segment)
-    mock_platform_body, mock_platform_shape = mock_platform_manager.create_platform()
-    mock_platform = mock_platform_body, mock_platform_shape
-    mock_platforms = [] 
-    mock_platforms.append(mock_platform)
-
-    # Create a mock character
-    mock_character = Mock(spec=Character)
-    mock_character.body = pymunk.Body(1,1)
-    mock_character.shape = pymunk.Poly.create_box(mock_character.body)
-
-    # Create a mock collision
-    mock_collision = Collision(mock_space, mock_character, mock_platforms)
-    
-    mock_collision.add_collision_handlers()
 
-    # Apply a downward force to simulate the character moving downward
-    mock_character.body.apply_impulse_at_local_point((0, 500), (0,0))
+    for offset in range(60, 400, 3):
+        collision, character = one_way_platform(s.HEIGHT / 2 - offset)
+        assert collision.solid_end == 1
+
+        character.body.velocity = (0, so.CHARACTER_MAX_VELOCITY_X)
+        step_one_way_platform(collision, 90)
+        assert character.body.position.y == pytest.approx(s.HEIGHT / 2 - so.PLATFORM_THICKNESS - character.height / 2, abs=1)
+        assert collision.on_ground is True
+        assert collision.solid_end == 1
+
+    # Below the platform, the character jumps through it
+    character.body.position = (s.WIDTH / 2, s.HEIGHT / 2 + 200)
+    collision.update_platform_filters()
+    assert collision.solid_end == 0
 
-    # When collide method is called, it should return True
-    assert mock_collision.collide(arbiter, space, data) == True
-    assert mock_collision.on_ground is True
+    del collision.platforms[:1]
+    collision.retire_platforms(1)
+    assert collision.solid_end == collision.filtered_end == 0
 
-def test_sensor_to_platform_collision() -> None:
+def test_platform_crossings() -> None:
     """ 
-    Test sensor to platform collision dection.
+    Test counting the platforms that the character crosses.
 
-    This function tests the collision detection between the sensor and the platform by creating mock objects and
-    simulating the collision.
+    This function tests that a platform is crossed once the crossing height of the character reaches the bottom
+    of the platform, that each platform is only counted once, and that the character falling back down doesn't
+    count the platforms again.
 
     Args:
         None
@@ -199,47 +231,25 @@ def test_sensor_to_platform_collision() -> None:
         None
     """
 
-    mock_space = Mock(pymunk.Space)
+    platform_manager = PlatformManager(pymunk.Space(), Camera(), 1)
+    platform_manager.generate_platform()
+    character = Character(platform_manager.space)
+    assert not any(isinstance(shape, pymunk.Segment) and shape.sensor for shape in character.body.shapes)
 
-    # Create a mock character
-    mock_character = Mock(spec=Character)
-    mock_character.body = pymunk.Body(1,1)
-    mock_character_sensor = pymunk.Segment(mock_character.body, (-s.WIDTH, 10), (s.WIDTH, 10), 0)
-    mock_character_sensor.sensor = True
+    # The character stands on the ground platform
+    character.body.position = (s.WIDTH / 2, so.PREV_Y - platform_manager.platforms_thickness - character.height / 2)
+    assert platform_manager.count_crossings(character.crossing_y()) == 1
+    assert platform_manager.count_crossings(character.crossing_y()) == 0
 
-    # Create a mock platform
-    mock_platform_manager = Mock(spec=PlatformManager)
-    body = Mock(spec=pymunk.Body.KINEMATIC)
-    segment = Mock(spec=pymunk.Segment)
-    mock_platform_manager.create_platform.return_value = (body, segment)
-    mock_platform_body, mock_platform_shape = mock_platform_manager.create_platform()
-    mock_platform = mock_platform_body, mock_platform_shape
-    mock_platforms = [] 
-    mock_platforms.append(mock_platform)
+    # Reaching the bottom of the next two platforms crosses them
+    bottom = platform_manager.y[2] + platform_manager.platforms_thickness
+    character.body.position = (s.WIDTH / 2, bottom - character.crossing_offset)
+    assert platform_manager.count_crossings(character.crossing_y()) == 2
+    assert platform_manager.passed[:3].all() and not platform_manager.passed[3:].any()
 
-    arbiter = Mock()
-    arbiter.shapes = [Mock(), Mock()]
-    arbiter.shapes[1].body = mock_platform_body
-    space = Mock()
-    data = Mock()
-
-    # Create a collision object
-    mock_collision = Collision(mock_space, mock_character, mock_platforms)
-
-    # Set the 'passed' attribute of the platform body to False
-    mock_platform_body.passed = False
-
-    # Call the sensor_collide method
-    result = mock_collision.sensor_collide(arbiter, space, data)
-
-    # Assert that the result is True (collision is allowed)
-    assert result is True
-
-    # Assert that the 'passed' attribute of the platform body is now True
-    assert mock_platform_body.passed is True
-
-    # Assert that the counter has been incremented (collision starts at -1)
-    assert mock_collision.counter == 0
+    character.body.position = (s.WIDTH / 2, so.PREV_Y)
+    assert platform_manager.count_crossings(character.crossing_y()) == 0
+    assert platform_manager.passed[:3].all()
 
 
 def test_movement() -> None:
@@ -308,8 +318,8 @@ def test_camera_to_player_scroll() -> None:
     """ 
     Test the camera to player scroll.
 
-    This function tests the camera to player scroll by creating mock objects and checking the change in the platform
-    positions.
+    This function tests the camera to player scroll by creating mock objects and checking that the camera
+    moves by the scroll amount while the platform positions stay the same.
 
     Args:
         None
@@ -330,21 +340,26 @@ def test_camera_to_player_scroll() -> None:
         mock_space.add(body)
         body.position = pymunk.Vec2d(0, 0) # Start platform at the top of the screen
 
-    scroll = Scroll(mock_space,mock_character, mock_platforms)
+    camera = Camera()
+    scroll = Scroll(mock_space,mock_character, mock_platforms, camera)
 
     initial_positions = [body.position.y for body, _ in mock_platforms]
+    initial_screen_positions = [camera.to_screen_y(y) for y in initial_positions]
     scroll_amount = scroll.move_camera()
     final_positions = [body.position.y for body, _ in mock_platforms]
 
-    for initial, final in zip(initial_positions, final_positions):
-        assert final == initial + scroll_amount
+    assert scroll_amount == s.HEIGHT / 4
+    assert camera.to_screen_y(mock_character_body.position.y) == s.HEIGHT / 2
+    for initial, initial_screen, final in zip(initial_positions, initial_screen_positions, final_positions):
+        assert final == initial
+        assert camera.to_screen_y(final) == initial_screen + scroll_amount
 
 def test_auto_scroll() -> None:
     """
     Test the auto scroll.
 
-    This function tests the auto scroll by creating mock objects and checking the change in the platform positions after
-    a certain elapsed time.
+    This function tests the auto scroll by creating mock objects and checking the change in the platform screen
+    positions after a certain elapsed time.
 
     Args:
         None
@@ -364,12 +379,13 @@ def test_auto_scroll() -> None:
     for body, _ in mock_platforms:
         mock_space.add(body)
         body.position = pymunk.Vec2d(0, 0) # Start platform at the top of the screen    
-    scroll = Scroll(mock_space,mock_character, mock_platforms)
+    camera = Camera()
+    scroll = Scroll(mock_space,mock_character, mock_platforms, camera)
 
     elapsed_time = 60
-    initial_positions = [body.position.y for body, _ in mock_platforms]
+    initial_positions = [camera.to_screen_y(body.position.y) for body, _ in mock_platforms]
     scroll_speed = scroll.auto_scroll(elapsed_time)
-    final_positions = [body.position.y for body, _ in mock_platforms]
+    final_positions = [camera.to_screen_y(body.position.y) for body, _ in mock_platforms]
 
     for initial, final in zip(initial_positions, final_positions):
         assert final == initial + scroll_speed
@@ -415,4 +431,729 @@ def test_game_over() -> None:
     mock_character.body = mock_character_body
     mock_mechanic.check_game_status.return_value = True
 
-    assert mock_mechanic.check_game_status(mock_character) is True
\ No newline at end of file
+    assert mock_mechanic.check_game_status(mock_character) is True
+
+def test_scale_cache() -> None:
+    """
+    Test the scaled image cache.
+
+    This function tests the scale cache by scaling the same image more than once and checking that it is
+    only scaled on the first request, and that the least recently used image is evicted when the cache is full.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    cache = ScaleCache(max_size=2)
+    img = pygame.Surface((10, 10))
+
+    first = cache.get(img, (20, 5))
+    second = cache.get(img, (20, 5))
+    assert first is second
+    assert first.get_size() == (20, 5)
+    assert cache.hits == 1 and cache.misses == 1
+
+    cache.get(img, (30, 5))
+    cache.get(img, (20, 5)) # (30, 5) is now the least recently used
+    cache.get(img, (40, 5))
+    assert len(cache.surfaces) == 2
+    assert (img, (30, 5)) not in cache.surfaces
+    assert (img, (20, 5)) in cache.surfaces
+
+def test_platform_sprites() -> None:
+    """
+    Test the pre-rendered platform sprites.
+
+    This function tests that a sprite is rendered for every platform when the sprites are loaded, and that
+    the sprites are rendered again with the next element once the platform counter reaches a new tier.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    platform_manager = PlatformManager(pymunk.Space(), Camera())
+    platform_manager.generate_platform()
+    sprite_factory = Mock(side_effect=lambda tier, width, height: (tier, width, height))
+    platform_manager.load_sprites(sprite_factory)
+
+    assert len(platform_manager.sprites) == len(platform_manager.y)
+    assert sprite_factory.call_count == len(platform_manager.y)
+    assert all(tier == 0 for tier, _, _ in platform_manager.sprites)
+
+    # Drawing the sprites again should not render anything
+    sprite_factory.reset_mock()
+    platform_manager.move_platforms()
+    sprite_factory.assert_not_called()
+
+    platform_manager.platform_counter = 100
+    platform_manager.move_platforms()
+    assert all(tier == 1 for tier, _, _ in platform_manager.sprites)
+
+def test_camera_visible() -> None:
+    """
+    Test the camera visibility check used to cull platforms.
+
+    This function tests that objects are only visible while part of them is inside the screen, and that
+    the visible area moves with the camera.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    camera = Camera()
+    assert camera.is_visible(s.HEIGHT / 2, 10)
+    assert camera.is_visible(-5, 10) # Partly above the top of the screen
+    assert not camera.is_visible(-20, 10)
+    assert not camera.is_visible(s.HEIGHT + 20, 10)
+
+    camera.store_previous()
+    camera.move(s.HEIGHT)
+    camera.interpolate(1.0)
+    assert camera.is_visible(-s.HEIGHT / 2, 10)
+    assert not camera.is_visible(s.HEIGHT / 2, 10)
+
+def test_highscore_write_behind(tmp_path, caplog) -> None:
+    """
+    Test the in-memory high score.
+
+    This function tests that a new high score is kept in memory, that it is written to the high score
+    file once the pending writes are flushed, and that a failed write is logged instead of raised.
+
+    Args:
+        tmp_path (Path): A temporary directory for the high score file.
+        caplog (LogCaptureFixture): The captured log records.
+
+    Returns:
+        None
+    """
+
+    high_score_file = tmp_path / "highscore.txt"
+    high_score_file.write_text("30")
+    mechanics = Mechanics(str(high_score_file))
+    assert mechanics.highscore() == 30
+
+    mechanics.score = 50
+    with patch.object(s, "audio"):
+        assert mechanics.highscore() == 50
+    mechanics.flush_highscore()
+
+    assert high_score_file.read_text() == "50"
+    assert not (tmp_path / "highscore.txt.tmp").exists()
+
+    # The high score can't be written to a missing directory
+    mechanics.high_score_file = str(tmp_path / "missing" / "highscore.txt")
+    mechanics.score = 60
+    with patch.object(s, "audio"):
+        assert mechanics.highscore() == 60
+    mechanics.flush_highscore()
+    assert "Could not save the high score" in caplog.text
+    assert mechanics.writer is None
+
+def test_platform_counter() -> None:
+    """
+    Test the passed platform counter.
+
+    This function tests that every platform the character passes is counted once, that the passed platforms
+    are forgotten when they are removed from the bottom of the platforms, and that new platforms at the top are
+    counted once they are passed.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    platform_manager = PlatformManager(pymunk.Space(), Camera(), 2)
+    platform_manager.generate_platform()
+    distance = platform_manager.platform_distance
+    bottom = lambda row: platform_manager.y[row] + platform_manager.platforms_thickness
+
+    assert platform_manager.count_crossings(bottom(2)) == 3
+    assert platform_manager.count_crossings(bottom(2)) == 0
+    assert platform_manager.count_crossings(bottom(3)) == 1
+
+    # Move the camera up until the two bottom platforms are removed and new platforms are added at the top
+    crossing_y = bottom(3)
+    rows = len(platform_manager.y)
+    platform_manager.camera.move(s.HEIGHT - platform_manager.y[1] + distance / 2 + 1)
+    platform_manager.move_platforms()
+    assert len(platform_manager.y) > rows - 2
+    assert platform_manager.count_crossings(crossing_y) == 0
+    assert np.count_nonzero(platform_manager.passed) == 2
+
+    assert platform_manager.count_crossings(bottom(len(platform_manager.y) - 1)) == len(platform_manager.y) - 2
+    assert platform_manager.passed.all()
+
+def test_camera_interpolation() -> None:
+    """
+    Test the camera drawing position between simulation steps.
+
+    This function tests that the camera is drawn between its positions before and after a step, while the
+    simulation position is not changed by the interpolation.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    camera = Camera()
+    camera.store_previous()
+    camera.move(10)
+
+    camera.interpolate(0.5)
+    assert camera.to_view_y(0) == 5
+    assert camera.to_screen_y(0) == 10
+
+    camera.interpolate(1.0)
+    assert camera.to_view_y(0) == camera.to_screen_y(0)
+
+@pytest.fixture
+def game_manager(tmp_path) -> GameManager:
+    """
+    Create a game with its collision filters assigned, writing its high score to a temporary directory.
+
+    Args:
+        tmp_path (Path): A temporary directory for the high score file.
+
+    Returns:
+        GameManager: The game.
+    """
+
+    high_score_file = str(tmp_path / "highscore.txt")
+    with patch("game_manager.Mechanics", lambda: Mechanics(high_score_file)):
+        game_manager = GameManager(GameSetup(pymunk.Space()))
+    game_manager.update_collision()
+    return game_manager
+
+def test_fast_forward_step(game_manager: GameManager) -> None:
+    """
+    Test fast-forwarding the game without rendering.
+
+    This function tests that stepping the game runs on simulation time, uses the given inputs instead of the
+    keyboard, and never updates the display.
+
+    Args:
+        game_manager (GameManager): A game that writes its high score to a temporary directory.
+
+    Returns:
+        None
+    """
+
+    game_manager.collision.counter = 10 # Start the auto scroll
+
+    with patch("pygame.display.update") as display_update, patch("pygame.key.get_pressed") as get_pressed:
+        game_manager.step(10, {pygame.K_RIGHT: True})
+
+    display_update.assert_not_called()
+    get_pressed.assert_not_called()
+    assert game_manager.simulation_ticks == pytest.approx(10 * s.dt * 1000)
+    assert game_manager.auto_scroll_seconds == pytest.approx(9 * s.dt)
+    assert game_manager.camera.y < 0
+    assert game_manager.character.body.velocity.x > 0
+
+def test_frame_profiler(tmp_path) -> None:
+    """
+    Test the frame profiler.
+
+    This function tests that stages are called but not measured while the profiler is disabled, that the ring
+    buffer keeps only the latest samples, that the time spent waiting is left out of the frame time, and that
+    the percentiles are reported and written to a file.
+
+    Args:
+        tmp_path (Path): A temporary directory for the report.
+
+    Returns:
+        None
+    """
+
+    stage = Mock()
+    profiler = FrameProfiler(size=100)
+    profiler.run([("stage", stage)])
+    stage.assert_called_once()
+    assert profiler.samples == {}
+
+    profiler.enabled = True
+    profiler.run([("stage", stage)])
+    assert profiler.counts["stage"] == 1
+
+    profiler.begin_frame()
+    assert profiler.idle(lambda seconds: time.sleep(seconds) or 16, 0.05) == 16
+    profiler.end_frame()
+    assert profiler.samples["frame"][0] < 0.05
+
+    for i in range(200):
+        profiler.record("frame", i / 1000)
+    assert min(profiler.samples["frame"]) == 0.100 # Only the latest 100 samples are kept
+    assert profiler.percentiles("frame") == (0.150, 0.195, 0.199)
+
+    report_file = tmp_path / "profile.txt"
+    profiler.dump(str(report_file))
+    assert "frame" in report_file.read_text()
+
+def test_text_cache() -> None:
+    """
+    Test the rendered text cache.
+
+    This function tests that static labels are only rendered once for the same font, text and colour, and that
+    HUD fields are only rendered again when their text changes.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    font = Mock()
+    font.render.side_effect = lambda text, antialias, color: Mock()
+
+    cache = TextCache()
+    label = cache.render(font, "PARKOUR", s.WHITE)
+    assert cache.render(font, "PARKOUR", s.WHITE) is label
+    assert cache.render(font, "PARKOUR", s.GREY) is not label
+    assert font.render.call_count == 2
+
+    font.render.reset_mock()
+    score = HudText(font, s.WHITE)
+    first = score.render("Score: 10")
+    assert score.render("Score: 10") is first
+    assert score.render("Score: 20") is not first
+    assert font.render.call_count == 2
+
+def test_dirty_region(game_manager: GameManager) -> None:
+    """
+    Test the dirty region rendering.
+
+    This function tests that the whole screen is only sent to the display when the view changes or the profiler
+    overlay is hidden, and that otherwise only the regions that changed are sent.
+
+    Args:
+        game_manager (GameManager): A game that writes its high score to a temporary directory.
+
+    Returns:
+        None
+    """
+
+    dirty = DirtyRegion()
+    with patch("pygame.display.update") as display_update:
+        dirty.update_display()
+        display_update.assert_called_once_with()
+
+        display_update.reset_mock()
+        dirty.update_display()
+        display_update.assert_not_called()
+
+        dirty.mark(pygame.Rect(0, 0, 10, 10))
+        dirty.update_display()
+        display_update.assert_called_once_with([pygame.Rect(0, 0, 10, 10)])
+
+    with patch("pygame.display.update") as display_update:
+        game_manager.render(1.0)
+        game_manager.update_display()
+        display_update.assert_called_once_with()
+
+        # Nothing moved, so nothing is sent to the display
+        display_update.reset_mock()
+        game_manager.render(1.0)
+        game_manager.update_display()
+        display_update.assert_not_called()
+
+        # Only the character moved
+        game_manager.character.body.position += (10, 0)
+        game_manager.render(1.0)
+        game_manager.update_display()
+        rects = display_update.call_args.args[0]
+        assert 0 < len(rects) <= 2
+        assert all(rect.colliderect(game_manager.character_rect.inflate(20, 0)) for rect in rects)
+
+        # Only the character sprite changed
+        display_update.reset_mock()
+        game_manager.render(1.0)
+        game_manager.collision.on_ground = not game_manager.collision.on_ground
+        game_manager.render(1.0)
+        game_manager.update_display()
+        display_update.assert_called_once_with([game_manager.character_rect] * 2)
+
+        # The profiler overlay is shown, then hidden while nothing else changes
+        game_manager.profiler.toggle_overlay()
+        game_manager.render(1.0)
+        game_manager.update_display()
+        game_manager.profiler.toggle_overlay()
+        display_update.reset_mock()
+        game_manager.render(1.0)
+        game_manager.update_display()
+        display_update.assert_called_once_with()
+
+        # The view scrolled
+        display_update.reset_mock()
+        game_manager.camera.move(10)
+        game_manager.camera.store_previous()
+        game_manager.render(1.0)
+        game_manager.update_display()
+        display_update.assert_called_once_with()
+
+def test_main_menu_idle() -> None:
+    """
+    Test that the main menu waits for events.
+
+    This function tests that the menu background is only loaded once, that events other than key presses don't
+    draw the menu again, and that only the menu items are sent to the display when the selection changes.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    events = [
+        pygame.event.Event(pygame.MOUSEMOTION),
+        pygame.event.Event(pygame.KEYDOWN, key=pygame.K_DOWN),
+        pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN),
+    ]
+    pressed = [{}, {pygame.K_DOWN: True}, {pygame.K_RETURN: True}]
+    pressed = [defaultdict(bool, key) for key in pressed]
+
+    with patch("pygame.event.wait", side_effect=events), \
+         patch("pygame.key.get_pressed", side_effect=pressed), \
+         patch("pygame.display.update") as display_update, \
+         patch("pygame.image.load", wraps=pygame.image.load) as image_load, \
+         patch("project.assets", AssetRegistry(s.IMAGES)), \
+         patch.object(s, "audio"):
+        assert project.main_menu() == "exit"
+
+    image_load.assert_called_once()
+    assert display_update.call_count == 2
+    assert display_update.call_args_list[0].args == ()
+    assert len(display_update.call_args_list[1].args[0]) == 2
+
+def test_game_state(game_manager: GameManager) -> None:
+    """
+    Test the states of the game.
+
+    This function tests that the game over screen is composed and drawn once when it is first rendered and not by
+    the simulation steps, that the world is not reset while the game over screen is displayed, and that it is
+    reset once when the game is restarted from the key press.
+
+    Args:
+        game_manager (GameManager): A game that writes its high score to a temporary directory.
+
+    Returns:
+        None
+    """
+
+    with patch.object(s, "audio") as audio, \
+         patch.object(game_manager.game_setup, "restore_snapshot", wraps=game_manager.game_setup.restore_snapshot) as restore_snapshot:
+        game_manager.character.body.position = (s.WIDTH / 2, s.HEIGHT * 2) # Below the screen
+        with patch.object(game_manager, "compose_game_over_frame", wraps=game_manager.compose_game_over_frame) as compose:
+            game_manager.step(1)
+        assert game_manager.state is GameState.GAME_OVER
+        compose.assert_not_called() # Simulation steps don't draw or load anything
+        audio.play_music.assert_not_called()
+
+        with patch.object(game_manager, "game_over_display", wraps=game_manager.game_over_display) as game_over_display:
+            for _ in range(3):
+                game_manager.step(1)
+                game_manager.render(1.0)
+        game_over_display.assert_called_once()
+        audio.play_music.assert_called_once_with("elevator")
+        restore_snapshot.assert_not_called()
+
+        # Other keys don't restart the game, and space restarts it even if it is released before the next step
+        project.handle_game_over_keys(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a), game_manager)
+        assert game_manager.state is GameState.GAME_OVER
+        project.handle_game_over_keys(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE), game_manager)
+        assert game_manager.state is GameState.RESTARTING
+        game_manager.step(1)
+        assert game_manager.state is GameState.PLAYING
+        restore_snapshot.assert_called_once()
+        assert game_manager.character.body.position.y < s.HEIGHT
+
+        # Key presses while the game is running are read from the keyboard
+        project.handle_game_over_keys(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE), game_manager)
+        assert game_manager.state is GameState.PLAYING
+
+def test_audio_manager() -> None:
+    """
+    Test the audio manager.
+
+    This function tests that a sound triggered again while it has just started playing is skipped and keeps its
+    channel, and that the music is only started once and only faded out while it is playing.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    audio = AudioManager(s.SOUNDS, s.MUSIC, cooldown=500)
+    with patch("pygame.time.get_ticks", side_effect=[0, 100]):
+        assert audio.play("parkour") is True
+        assert audio.play("parkour") is False
+    assert audio.plays == 1 and audio.skipped == 1
+    assert audio.channels_busy() <= len(s.SOUNDS)
+
+    with patch("pygame.mixer.music") as music:
+        audio.play_music("elevator")
+        audio.play_music("elevator")
+        audio.fadeout_music(1)
+        audio.fadeout_music(1)
+    music.play.assert_called_once()
+    music.fadeout.assert_called_once_with(1)
+    assert audio.music_starts == 1
+
+def test_asset_registry() -> None:
+    """
+    Test the asset registry.
+
+    This function tests that images are only loaded when they are first used, that they are loaded once and
+    converted to the pixel format of the display, and that the load time of each image is reported.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    registry = AssetRegistry(s.IMAGES)
+    with patch("pygame.image.load", wraps=pygame.image.load) as image_load:
+        images = Images(registry)
+        image_load.assert_not_called()
+
+        first = images.character_img
+        second = Images(registry).character_img
+    image_load.assert_called_once()
+    assert first is second
+    assert first.get_bitsize() == s.screen.get_bitsize()
+    assert first.get_flags() & pygame.SRCALPHA
+    assert not images.bg.get_flags() & pygame.SRCALPHA
+    assert list(registry.load_times) == ["character", "background1"]
+    assert len(registry.report()) == 3
+
+def test_preload_assets() -> None:
+    """
+    Test loading the assets on a thread pool.
+
+    This function tests that preloaded images are decoded by the thread pool and converted when they are first
+    used, and that preloaded sounds are waited for when they are first played.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    registry = AssetRegistry(s.IMAGES)
+    audio = AudioManager(s.SOUNDS, s.MUSIC)
+    executor = ThreadPoolExecutor(max_workers=2)
+    first_assets = registry.preload(executor, s.FIRST_ASSETS)
+    registry.preload(executor)
+    audio.preload(executor)
+    executor.shutdown(wait=True)
+
+    assert len(first_assets) == len(s.FIRST_ASSETS)
+    assert set(registry.pending) == set(s.IMAGES)
+    assert registry.surfaces == {}
+
+    with patch("pygame.image.load") as image_load, patch("pygame.mixer.Sound") as sound:
+        background = registry.get("main_menu_background")
+        audio.get_sound("parkour")
+    image_load.assert_not_called()
+    sound.assert_not_called()
+    assert background.get_bitsize() == s.screen.get_bitsize()
+    assert "main_menu_background" not in registry.pending
+    assert registry.load_times["main_menu_background"] > 0
+
+def test_asset_bundle(tmp_path) -> None:
+    """
+    Test the packed asset bundle.
+
+    This function tests that a bundle that was not built is not opened, that the bundle is built in a directory
+    keyed on the resolution, that opening it checks the stamp of the source files without reading them, that a
+    changed source file or mixer format is detected, and that images, pre-scaled sprites, fonts and sounds are read from it
+    without decoding their files.
+
+    Args:
+        tmp_path (Path): A temporary directory for the bundle.
+
+    Returns:
+        None
+    """
+
+    source = tmp_path / "source.txt"
+    source.write_text("a")
+    bundle = AssetBundle(str(tmp_path))
+    source_files = bundle.source_files() + [str(source)]
+    with patch.object(bundle, "source_files", return_value=source_files):
+        assert bundle.open() is None
+
+        path = bundle.build()
+        assert os.path.basename(os.path.dirname(path)) == f"{s.WIDTH}x{s.HEIGHT}"
+        with patch("builtins.open", wraps=open) as open_file:
+            assert bundle.open() is bundle
+        open_file.assert_called_once_with(path, "rb") # Only the bundle is read
+
+        # A bundle built in another mixer format needs to be built again
+        with patch("pygame.mixer.get_init", return_value=(44100, -16, 2)):
+            assert bundle.open() is None
+
+        # A changed source file needs the bundle to be built again
+        source.write_text("ab")
+        assert bundle.open() is None
+    bundle.build()
+    assert bundle.open() is bundle
+
+    registry = AssetRegistry(s.IMAGES, bundle)
+    audio = AudioManager(s.SOUNDS, s.MUSIC, bundle=bundle)
+    images = Images(registry)
+    platform_height = round(so.PLATFORM_THICKNESS * 2)
+    with patch("pygame.image.load") as image_load, patch("pygame.mixer.Sound", wraps=pygame.mixer.Sound) as sound:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert registry.preload(executor) == []
+            audio.preload(executor)
+        assert audio.pending == {}
+        sound.assert_not_called() # Checking the bundle doesn't create the sound effects
+        wall = registry.get("wall_left")
+        platform = images.platform_sprite(3, so.PLATFORM_WIDTHS[0], so.PLATFORM_THICKNESS * 2)
+        character = images.sprite("character", so.CHARACTER_WIDTH, so.CHARACTER_HEIGHT)
+        parkour = audio.get_sound("parkour")
+    image_load.assert_not_called()
+    assert all("buffer" in call.kwargs for call in sound.call_args_list)
+
+    assert wall.get_size() == pygame.image.load(os.path.join("img", "rock_wall_left.png")).get_size()
+    assert platform.get_size() == (so.PLATFORM_WIDTHS[0], platform_height)
+    assert character.get_flags() & pygame.SRCALPHA
+    assert parkour.get_length() > 0
+    assert bundle.font(s.FONT_PATH, 20).size("Score") == pygame.font.Font(s.FONT_PATH, 20).size("Score")
+
+def test_restart_snapshot(game_manager: GameManager) -> None:
+    """
+    Test restarting the game from the world snapshot.
+
+    This function tests that restarting the game restores the starting layout of the platforms, the character
+    and the camera, that nothing is kept from the previous run, and that the collision filters are assigned in
+    the restored space.
+
+    Args:
+        game_manager (GameManager): A game that writes its high score to a temporary directory.
+
+    Returns:
+        None
+    """
+
+    layout = [tuple(body.position) for body, _ in game_manager.platforms]
+    start = game_manager.character.body.position
+
+    with patch.object(s, "audio"):
+        game_manager.step(120, {pygame.K_SPACE: True, pygame.K_RIGHT: True})
+        old_space = game_manager.space
+        game_manager.end_game()
+        game_manager.step(1, {pygame.K_SPACE: True})
+        game_manager.step(1)
+
+    assert game_manager.state is GameState.PLAYING
+    assert game_manager.space is not old_space
+    assert [tuple(body.position) for body, _ in game_manager.platforms] == layout
+    assert game_manager.character.body.position == start
+    assert game_manager.camera.y == 0
+    assert game_manager.collision.counter == -1
+    assert not game_manager.platform_manager.passed.any()
+    assert game_manager.platforms is game_manager.platform_manager.platforms
+    assert len(game_manager.platform_manager.sprites) == len(game_manager.platform_manager.y)
+    assert game_manager.character.body in game_manager.space.bodies
+    assert game_manager.character.shape.filter.categories == CHARACTER_CATEGORY
+
+    # The restored space counts the platforms the character passes again
+    game_manager.step(60, {pygame.K_SPACE: True})
+    assert game_manager.collision.counter >= 0
+
+def test_level_stream() -> None:
+    """
+    Test streaming the platforms of the level.
+
+    This function tests that the same seed generates the same level, that the platforms are kept ordered from
+    the bottom to the top, that only the platforms near the character have a body in the space, and that the
+    number of platforms stays the same however far the camera climbs.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    def level(seed: int) -> PlatformManager:
+        platform_manager = PlatformManager(pymunk.Space(), Camera(), seed)
+        platform_manager.generate_platform()
+        return platform_manager
+
+    platform_manager = level(1)
+    assert np.array_equal(platform_manager.x, level(1).x)
+    assert len(platform_manager.space.bodies) == len(platform_manager.platforms) < len(platform_manager.y)
+
+    live = []
+    retired = 0
+    for _ in range(2000):
+        platform_manager.camera.move(so.PLATFORM_DISTANCE / 4)
+        character_y = platform_manager.camera.to_world_y(s.HEIGHT / 2)
+        retired += platform_manager.move_platforms(character_y)
+        live.append((len(platform_manager.y), len(platform_manager.space.bodies)))
+        assert np.all(np.diff(platform_manager.y) < 0)
+        assert [body.position.y for body, _ in platform_manager.platforms] == platform_manager.y[:len(platform_manager.platforms)].tolist()
+
+    assert retired > 400 # The element tiers started over
+    assert max(rows for rows, _ in live) <= 4 * s.PLATFORMS_PER_CHUNK
+    assert all(bodies < rows for rows, bodies in live)
+    assert len(platform_manager.sprites) == len(platform_manager.y)
+
+    first, last = platform_manager.visible_rows()
+    visible = [platform_manager.camera.is_visible(y, platform_manager.platforms_thickness) for y in platform_manager.y]
+    assert [i for i, is_visible in enumerate(visible) if is_visible] == list(range(first, last))
+
+def test_random_block() -> None:
+    """
+    Test drawing the platform positions and sizes from the random block.
+
+    This function tests that the random block is only drawn again once every chunk in it was used, that the
+    positions and sizes of the platforms are in range, and that a pickled platform manager continues the level
+    from the same random numbers.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    platform_manager = PlatformManager(pymunk.Space(), Camera(), 3)
+    with patch.object(platform_manager, "refill_random_block", wraps=platform_manager.refill_random_block) as refill:
+        for _ in range(s.RANDOM_BLOCK_CHUNKS + 1):
+            next(platform_manager.stream)
+    assert refill.call_count == 2
+
+    platform_manager.generate_platform()
+    narrow = platform_manager.half_width < s.WIDTH / 2
+    assert np.all(np.isin(platform_manager.half_width[narrow] * 2, so.PLATFORM_WIDTHS))
+    assert np.all((platform_manager.x >= int(so.PLATFORM_MIN_X)) & (platform_manager.x <= int(so.PLATFORM_MAX_X)))
+
+    restored = pickle.loads(pickle.dumps(platform_manager))
+    for manager in (platform_manager, restored):
+        manager.camera.move(s.HEIGHT * 3)
+        manager.move_platforms()
+    assert np.array_equal(platform_manager.x, restored.x)
+    assert np.array_equal(platform_manager.half_width, restored.half_width)
@@ -0,0 +1,123 @@
+"""
+Text rendering cache.
+
+Rendering text with a font rasterizes every glyph, so rendered text is kept and
+only rendered again when it changes. Static labels are kept in a shared cache
+keyed on the font, text and colour, and HUD fields keep the surface of the value
+they display.
+"""
+
+import pygame
+from collections import OrderedDict
+from typing import List, Tuple
+
+class TextCache:
+    """
+    Bounded least recently used cache of rendered text.
+
+    Attributes:
+        max_size (int): The maximum number of rendered texts kept in the cache.
+        surfaces (OrderedDict): The rendered texts, keyed on the font, text and colour.
+    """
+
+    def __init__(self, max_size: int = 128) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size (int): The maximum number of rendered texts kept in the cache.
+        """
+
+        self.max_size: int = max_size
+        self.surfaces: OrderedDict = OrderedDict()
+
+    def render(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        """
+        Return the text rendered with the font and colour, rendering it only on a cache miss.
+
+        Args:
+            font (pygame.font.Font): The font to render the text with.
+            text (str): The text to render.
+            color (Tuple[int, int, int]): The colour of the text.
+
+        Returns:
+            pygame.Surface: The rendered text.
+        """
+
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False) # Evict the least recently used text
+        return surface
+
+class HudText:
+    """
+    A text field of the HUD that is only rendered again when the displayed text changes.
+
+    Attributes:
+        font (pygame.font.Font): The font of the field.
+        color (Tuple[int, int, int]): The colour of the field.
+        text (str): The text that is displayed.
+        surface (pygame.Surface): The rendered text.
+        rect (pygame.Rect): The region of the screen the text was last drawn in.
+    """
+
+    def __init__(self, font: pygame.font.Font, color: Tuple[int, int, int]) -> None:
+        """
+        Initialize an empty field.
+
+        Args:
+            font (pygame.font.Font): The font of the field.
+            color (Tuple[int, int, int]): The colour of the field.
+        """
+
+        self.font = font
+        self.color = color
+        self.text: str = None
+        self.surface: pygame.Surface = None
+        self.rect: pygame.Rect = None
+
+    def render(self, text: str) -> pygame.Surface:
+        """
+        Return the rendered text, rendering it only if it is different from the displayed text.
+
+        Args:
+            text (str): The text to display.
+
+        Returns:
+            pygame.Surface: The rendered text.
+        """
+
+        if text != self.text:
+            self.text = text
+            self.surface = self.font.render(text, True, self.color)
+        return self.surface
+
+    def draw(self, screen: pygame.Surface, text: str, position: Tuple[float, float]) -> List[pygame.Rect]:
+        """
+        Draw the text on the screen.
+
+        Args:
+            screen (pygame.Surface): The surface to draw the text on.
+            text (str): The text to display.
+            position (Tuple[float, float]): The top left position of the text.
+
+        Returns:
+            List[pygame.Rect]: The regions of the screen that changed, empty if the same text was
+            already drawn at the same position.
+        """
+
+        previous_text, previous_rect = self.text, self.rect
+        self.rect = screen.blit(self.render(text), position)
+        if text == previous_text and self.rect == previous_rect:
+            return []
+        return [self.rect] if previous_rect is None else [previous_rect, self.rect]
+
+# Shared cache of the static labels of the game
+text_cache = TextCache()